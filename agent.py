@@ -1,28 +1,101 @@
-from langchain_community.chat_models import ChatZhipuAI
-from langchain.agents import create_agent
-from tools import (
-    read_file,
-    write_file,
-    list_directory,
-    copy_file,
-    delete_file,
-    search_files,
-    get_current_time,
-    send_notification,
-    append_to_log,
-    search_web,
-)
 from config import Config
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+# LangChain, the model client and the tools are imported where first used,
+# so importing this module (and starting the CLI) stays cheap
+
+# Compiled agent graphs, shared by agents with the same model, tools and prompt
+COMPILED_AGENT_CACHE_SIZE = 32
+_compiled_agents: "OrderedDict[tuple, tuple]" = OrderedDict()
+_compiled_lock = threading.Lock()
+
+
+def _model_key(llm) -> str:
+    """Digest of the model's settings, so differently configured models differ."""
+
+    from pydantic import SecretStr
+
+    def reveal(value):
+        if isinstance(value, SecretStr):
+            return value.get_secret_value()
+        return repr(value)
+
+    settings = json.dumps(llm.model_dump(), sort_keys=True, default=reveal)
+    return hashlib.sha1(settings.encode("utf-8")).hexdigest()
+
+
+def compile_agent(llm, tools: list, system_prompt: str, middleware: tuple = ()):
+    """Return a compiled agent graph, reusing a cached one when possible.
+
+    ``middleware`` instances must compare equal when their settings are.
+    """
+    key = (
+        id(type(llm)),
+        _model_key(llm),
+        tuple(id(tool) for tool in tools),
+        system_prompt,
+        tuple(middleware),
+    )
+    with _compiled_lock:
+        cached = _compiled_agents.get(key)
+        if cached is not None:
+            _compiled_agents.move_to_end(key)
+            return cached[0]
+        from langchain.agents import create_agent
+
+        agent = create_agent(
+            model=llm,
+            tools=list(tools),
+            system_prompt=system_prompt,
+            middleware=list(middleware),
+        )
+        # Holding the model and tools keeps the ids in the key from being reused
+        _compiled_agents[key] = (agent, llm, tuple(tools))
+        while len(_compiled_agents) > COMPILED_AGENT_CACHE_SIZE:
+            _compiled_agents.popitem(last=False)
+        return agent
 
 
 class TaskAutomationAgent:
     def __init__(self, config=None):
+        from tools import (
+            read_file,
+            write_file,
+            list_directory,
+            copy_file,
+            delete_file,
+            search_files,
+            copy_files,
+            delete_files,
+            write_files,
+            get_current_time,
+            send_notification,
+            append_to_log,
+            search_web,
+        )
+        from tools.notifications import configure_notifications
+        from tools.search_tools import configure_search
+        from llm_client import PooledChatZhipuAI
+
         if config is None:
             config = Config
 
-        self.llm = ChatZhipuAI(model=config.MODEL_NAME, temperature=config.TEMPERATURE)
+        # Reuses keep-alive connections to the API, see llm_client.py
+        self.llm = PooledChatZhipuAI(
+            model=config.MODEL_NAME,
+            temperature=config.TEMPERATURE,
+            cache=config.get_llm_cache(),
+        )
 
-        search_provider = config.get_search_provider()
+        # search_web and send_notification build their backends on first use
+        configure_search(config)
+        configure_notifications(config)
 
         self.tools = [
             read_file,
@@ -31,86 +104,364 @@ class TaskAutomationAgent:
             copy_file,
             delete_file,
             search_files,
+            copy_files,
+            delete_files,
+            write_files,
             get_current_time,
             send_notification,
             append_to_log,
             search_web,
         ]
 
+        from budgets import BudgetMiddleware
+        from concurrency import ToolConcurrencyMiddleware
+
+        self.max_execution_time = config.MAX_EXECUTION_TIME
+        # Stops runaway tool loops; see budgets.py. The graph's recursion
+        # limit is only a backstop, as each step takes a few graph supersteps.
+        # Tool calls of one step run in parallel on up to max_tool_concurrency
+        # threads; concurrency.py caps individual tools. Waiting for a slot
+        # counts against the tool's timeout, so the budget goes first.
+        self.middleware = (
+            BudgetMiddleware(
+                max_iterations=config.MAX_ITERATIONS,
+                tool_timeout=config.TOOL_TIMEOUT,
+                tool_timeouts=config.get_tool_timeouts(),
+            ),
+            ToolConcurrencyMiddleware(config.get_tool_concurrency()),
+        )
+        self.recursion_limit = 4 * (config.MAX_ITERATIONS + 1)
+        self.max_tool_concurrency = config.MAX_TOOL_CONCURRENCY
+
+        # Each finished run's metrics are passed to these (see telemetry.py)
+        self.metrics_sinks = config.get_metrics_sinks()
+
         self.memory = None
         if config.ENABLE_MEMORY:
-            from tools.memory_manager import ConversationRAGMemory
+            from tools.memory_manager import SessionMemoryPool
 
-            self.memory = ConversationRAGMemory(
-                memory_file=config.MEMORY_FILE, max_size=config.MAX_MEMORY_SIZE
+            self.memory = SessionMemoryPool(
+                memory_dir=config.MEMORY_DIR,
+                max_shards=config.MAX_MEMORY_SHARDS,
+                default_file=config.MEMORY_FILE,
+                max_size=config.MAX_MEMORY_SIZE,
+                embeddings=config.get_embeddings(),
+                index_type=config.MEMORY_INDEX,
+                nprobe=config.MEMORY_IVF_NPROBE,
             )
+        self.context_settings = {
+            "max_tokens": config.CONTEXT_MAX_TOKENS,
+            "max_entry_tokens": config.CONTEXT_ENTRY_MAX_TOKENS,
+            "candidates": config.CONTEXT_CANDIDATES,
+            "recency_weight": config.CONTEXT_RECENCY_WEIGHT,
+        }
 
         system_prompt = (
             f"You are a helpful task automation assistant with web access. "
-            f"Search provider: {Config.SEARCH_PROVIDER}. "
+            f"Search provider: {config.SEARCH_PROVIDER}. "
             "Use web_search to look up current information when needed. "
-            "Use file tools to manage data. "
+            "Use file tools to manage data; prefer the batch tools (copy_files, "
+            "delete_files, write_files) when acting on many files. "
         )
         if config.ENABLE_MEMORY:
             system_prompt += " You have access to conversation memory with semantic search capabilities. "
             system_prompt += "Use relevant past context when answering."
         system_prompt += "Always confirm when a task is complete."
+        self.system_prompt = system_prompt
 
-        self.agent = create_agent(
-            model=self.llm,
-            tools=self.tools,
-            system_prompt=system_prompt,
+        # Compiled on first use, see the ``agent`` property
+        self._agent = None
+
+    @property
+    def agent(self):
+        """The compiled agent graph, built on first use."""
+        if self._agent is None:
+            self._agent = compile_agent(
+                self.llm, self.tools, self.system_prompt, self.middleware
+            )
+        return self._agent
+
+    @agent.setter
+    def agent(self, value):
+        self._agent = value
+
+    def _prepare(self, memory, task: str) -> Tuple[List[dict], str, int]:
+        """Build the agent input, prefixed with relevant conversation context.
+
+        Returns:
+            The input messages, the context and its estimated token count.
+        """
+        # Relevant and recent messages, packed into the context token budget
+        context, context_tokens = "", 0
+        if memory:
+            context, context_tokens = memory.build_context(
+                query=task, **self.context_settings
+            )
+
+        # Format task with context
+        full_task = task
+        if context:
+            full_task = f"{context}\n\nCurrent task: {task}"
+
+        return [{"role": "user", "content": full_task}], context, context_tokens
+
+    def _invoke_args(self, messages: List[dict], telemetry) -> Tuple[dict, dict]:
+        """Agent input carrying the run's deadline, and its run config."""
+        inputs = {
+            "messages": messages,
+            "deadline": time.time() + self.max_execution_time,
+        }
+        config = {
+            "callbacks": [telemetry],
+            "recursion_limit": self.recursion_limit,
+            "max_concurrency": self.max_tool_concurrency,
+        }
+        return inputs, config
+
+    @staticmethod
+    def _save(memory, task: str, result: dict):
+        """Save the conversation turn to memory."""
+        from budgets import exhausted_budget
+
+        messages = result.get("messages")
+        # A run cut short has no real answer worth remembering
+        if memory and messages and not exhausted_budget(messages[-1]):
+            user_msg = {"role": "user", "content": task}
+            assistant_msg = {
+                "role": "assistant",
+                "content": result["messages"][-1].content,
+            }
+            memory.add_messages([user_msg, assistant_msg])
+
+    def _format_result(
+        self, result: dict, context: str, context_tokens: int = 0
+    ) -> dict:
+        from budgets import exhausted_budget
+
+        messages = result.get("messages", [])
+        budget = exhausted_budget(messages[-1]) if messages else None
+        if budget:
+            return self._partial_result(
+                budget, messages[-1].content, messages, context, context_tokens
+            )
+        return {
+            "success": True,
+            "output": messages[-1].content if messages else "",
+            "memory_enabled": self.memory is not None,
+            "context_used": bool(context),
+            "context_retrieved": len(context.split("\n")) if context else 0,
+            "context_tokens": context_tokens,
+        }
+
+    def _partial_result(
+        self,
+        budget: str,
+        error: str,
+        messages: list = (),
+        context: str = "",
+        context_tokens: int = 0,
+    ) -> dict:
+        """Result of a run stopped by a budget, with the last answer so far."""
+        partial = next(
+            (
+                m.content
+                for m in reversed(messages[:-1])
+                if m.type == "ai" and m.content
+            ),
+            "",
         )
+        return {
+            "success": False,
+            "partial": True,
+            "budget_exhausted": budget,
+            "error": error,
+            "output": partial,
+            "memory_enabled": self.memory is not None,
+            "context_used": bool(context),
+            "context_retrieved": len(context.split("\n")) if context else 0,
+            "context_tokens": context_tokens,
+        }
+
+    def _finish(self, telemetry, output: dict) -> dict:
+        """Attach the run's metrics to ``output`` and hand them to the sinks."""
+        from telemetry import emit
+
+        output["metrics"] = telemetry.metrics(success=output["success"])
+        emit(self.metrics_sinks, output["metrics"])
+        return output
+
+    def run(self, task: str, session_id: Optional[str] = None) -> dict:
+        """Execute task and return result with RAG context.
+
+        Args:
+            task: Task description.
+            session_id: Memory shard to read and write; None uses MEMORY_FILE.
+        """
+        from langgraph.errors import GraphRecursionError
+        from telemetry import RunTelemetry
 
-    def run(self, task: str) -> dict:
-        """Execute task and return result with RAG context."""
+        telemetry = RunTelemetry()
+        memory = None
         try:
-            # Get relevant conversation context using semantic search
-            context = ""
-            context_retrieved = False
-            if self.memory:
-                context = self.memory.retrieve_relevant_context(query=task, k=3)
-                context_retrieved = len(context.split("\n")) > 0 if context else False
-
-            # Format task with context
-            full_task = task
-            if context:
-                full_task = f"{context}\n\nCurrent task: {task}"
-
-            messages = [{"role": "user", "content": full_task}]
-            result = self.agent.invoke({"messages": messages})
-
-            # Save conversation to memory
-            if self.memory and result.get("messages"):
-                user_msg = {"role": "user", "content": task}
-                assistant_msg = {
-                    "role": "assistant",
-                    "content": result["messages"][-1].content,
-                }
-                self.memory.add_messages([user_msg, assistant_msg])
-
-            return {
-                "success": True,
-                "output": result.get("messages", [])[-1].content
-                if result.get("messages")
-                else "",
-                "memory_enabled": self.memory is not None,
-                "context_used": context_retrieved,
-                "context_retrieved": len(context.split("\n")) if context else 0,
-            }
+            with telemetry.phase("memory_retrieval"):
+                if self.memory is not None:
+                    memory = self.memory.acquire(session_id)
+                messages, context, context_tokens = self._prepare(memory, task)
+            result = self.agent.invoke(*self._invoke_args(messages, telemetry))
+            with telemetry.phase("memory_save"):
+                self._save(memory, task, result)
+
+            return self._finish(
+                telemetry, self._format_result(result, context, context_tokens)
+            )
+        except GraphRecursionError as e:
+            return self._finish(telemetry, self._partial_result("iterations", str(e)))
+        except Exception as e:
+            return self._finish(telemetry, {"success": False, "error": str(e)})
+        finally:
+            if memory is not None:
+                self.memory.release(session_id)
+
+    async def arun(self, task: str, session_id: Optional[str] = None) -> dict:
+        """Async version of ``run``.
+
+        The model is called through the agent's ``ainvoke``; memory loading,
+        retrieval and saving run in worker threads so the event loop stays
+        free, and LangChain runs the sync tools in its executor.
+        """
+        from langgraph.errors import GraphRecursionError
+        from telemetry import RunTelemetry
+
+        telemetry = RunTelemetry()
+        memory = None
+        try:
+            with telemetry.phase("memory_retrieval"):
+                if self.memory is not None:
+                    memory = await asyncio.to_thread(self.memory.acquire, session_id)
+                messages, context, context_tokens = await asyncio.to_thread(
+                    self._prepare, memory, task
+                )
+            result = await self.agent.ainvoke(*self._invoke_args(messages, telemetry))
+            with telemetry.phase("memory_save"):
+                await asyncio.to_thread(self._save, memory, task, result)
+
+            return self._finish(
+                telemetry, self._format_result(result, context, context_tokens)
+            )
+        except GraphRecursionError as e:
+            return self._finish(telemetry, self._partial_result("iterations", str(e)))
         except Exception as e:
-            return {"success": False, "error": str(e)}
+            return self._finish(telemetry, {"success": False, "error": str(e)})
+        finally:
+            if memory is not None:
+                await asyncio.to_thread(self.memory.release, session_id)
+
+    def stream(self, task: str, session_id: Optional[str] = None) -> Iterator[dict]:
+        """Run a task like ``run``, yielding events as they happen.
+
+        Events are dicts with a ``type``:
+
+        - ``"token"``: ``content``, a piece of model output text
+        - ``"tool_call"``: ``name``, ``args`` and ``id`` of a requested call
+        - ``"tool_result"``: ``name``, ``content`` and ``id`` of its result
+        - ``"result"``: ``result``, the dict ``run`` would return; always last
+
+        Models that don't stream produce one token event per answer.
+        """
+        from langchain_core.messages import AIMessage, ToolMessage
+        from langgraph.errors import GraphRecursionError
+        from telemetry import RunTelemetry
+
+        telemetry = RunTelemetry()
+        memory = None
+        try:
+            with telemetry.phase("memory_retrieval"):
+                if self.memory is not None:
+                    memory = self.memory.acquire(session_id)
+                messages, context, context_tokens = self._prepare(memory, task)
+
+            produced = []
+            for mode, chunk in self.agent.stream(
+                *self._invoke_args(messages, telemetry),
+                stream_mode=["messages", "updates"],
+            ):
+                if mode == "messages":
+                    message, metadata = chunk
+                    if (
+                        metadata.get("langgraph_node") == "model"
+                        and isinstance(message, AIMessage)
+                        and message.text
+                    ):
+                        yield {"type": "token", "content": message.text}
+                    continue
+
+                for update in chunk.values():
+                    for message in (update or {}).get("messages", []):
+                        produced.append(message)
+                        if isinstance(message, ToolMessage):
+                            yield {
+                                "type": "tool_result",
+                                "name": message.name,
+                                "content": message.text,
+                                "id": message.tool_call_id,
+                            }
+                        elif isinstance(message, AIMessage):
+                            for call in message.tool_calls:
+                                yield {
+                                    "type": "tool_call",
+                                    "name": call["name"],
+                                    "args": call["args"],
+                                    "id": call["id"],
+                                }
+
+            result = {"messages": produced}
+            with telemetry.phase("memory_save"):
+                self._save(memory, task, result)
+            output = self._format_result(result, context, context_tokens)
+        except GraphRecursionError as e:
+            output = self._partial_result("iterations", str(e))
+        except Exception as e:
+            output = {"success": False, "error": str(e)}
+        finally:
+            if memory is not None:
+                self.memory.release(session_id)
+        yield {"type": "result", "result": self._finish(telemetry, output)}
+
+    async def abatch(
+        self,
+        tasks: List[str],
+        session_ids: Optional[List[Optional[str]]] = None,
+        max_concurrency: int = 16,
+    ) -> List[dict]:
+        """Run many tasks concurrently, at most ``max_concurrency`` in flight.
+
+        Returns:
+            One result per task, in the order of ``tasks``.
+
+        Raises:
+            ValueError: If ``session_ids`` isn't the same length as ``tasks``.
+        """
+        if session_ids is None:
+            session_ids = [None] * len(tasks)
+        elif len(session_ids) != len(tasks):
+            raise ValueError(
+                f"Got {len(session_ids)} session_ids for {len(tasks)} tasks"
+            )
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(task: str, session_id: Optional[str]) -> dict:
+            async with semaphore:
+                return await self.arun(task, session_id=session_id)
+
+        return await asyncio.gather(
+            *(run_one(task, sid) for task, sid in zip(tasks, session_ids))
+        )
+
+    def add_tools(self, *tool_funcs):
+        """Add custom tools; the agent is recompiled once, on the next run."""
+        self.tools.extend(tool_funcs)
+        self._agent = None
 
     def add_tool(self, tool_func):
         """Add a custom tool to the agent."""
-        self.tools.append(tool_func)
-        self.agent = create_agent(
-            model=self.llm,
-            tools=self.tools,
-            system_prompt=(
-                f"You are a helpful task automation assistant with web access. "
-                f"Search provider: {Config.SEARCH_PROVIDER}. "
-                "Use web_search to look up current information when needed. "
-                "Use file tools to manage data. "
-            ),
-        )
+        self.add_tools(tool_func)
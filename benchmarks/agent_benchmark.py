@@ -0,0 +1,264 @@
+"""Offline benchmarks for the agent's own overhead.
+
+The model is ``ScriptedChatModel`` and web search is ``FakeSearchProvider``
+(see fakes.py), so no API key or network is needed and every run does the
+same work. Each measurement prints one JSON line; save the output of two
+runs and diff them to spot regressions.
+
+Usage:
+    python benchmarks/agent_benchmark.py
+    python benchmarks/agent_benchmark.py --suite turn memory --turns 100
+    python benchmarks/agent_benchmark.py --suite memory --memory-sizes 10 1000 100000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config import Config
+from fakes import ScriptedChatModel
+
+SUITES = ("turn", "memory", "files", "startup")
+# Any well-formed key works, the model is never called
+os.environ.setdefault("ZHIPUAI_API_KEY", "benchmark." + "0" * 32)
+
+
+def summarize(seconds, prefix=""):
+    """Mean, p50 and p99 of ``seconds`` in milliseconds."""
+    ordered = sorted(seconds)
+    p99 = ordered[min(len(ordered) - 1, round(0.99 * (len(ordered) - 1)))]
+    return {
+        f"{prefix}mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        f"{prefix}p50_ms": round(statistics.median(ordered) * 1000, 3),
+        f"{prefix}p99_ms": round(p99 * 1000, 3),
+    }
+
+
+def emit(result):
+    print(json.dumps(result), flush=True)
+
+
+def make_agent(workdir, searches=1, memory_size=None):
+    """Agent with the scripted model, fake search and memory under ``workdir``."""
+    from agent import TaskAutomationAgent
+
+    class BenchConfig(Config):
+        SEARCH_PROVIDER = "fake"
+        SEARCH_CACHE_ENABLED = False
+        LLM_CACHE_ENABLED = False
+        METRICS_SINKS = ""
+        ENABLE_MEMORY = memory_size is not None
+        MAX_MEMORY_SIZE = memory_size or 10
+        MEMORY_FILE = os.path.join(workdir, "memory.json")
+        MEMORY_DIR = os.path.join(workdir, "sessions")
+
+    agent = TaskAutomationAgent(BenchConfig)
+    agent.llm = ScriptedChatModel(searches=searches)
+    return agent
+
+
+def bench_turns(turns, searches=(0, 1, 3)):
+    """Whole-turn latency with instant model and search, i.e. pure overhead."""
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in searches:
+            agent = make_agent(workdir, searches=count)
+            agent.run("warm up")
+            totals, overheads = [], []
+            for i in range(turns):
+                metrics = agent.run(f"Look up topic {i}")["metrics"]
+                totals.append(metrics["total_s"])
+                overheads.append(metrics["overhead_s"])
+            emit(
+                {
+                    "benchmark": "turn",
+                    "searches": count,
+                    "turns": turns,
+                    **summarize(totals),
+                    **summarize(overheads, "overhead_"),
+                }
+            )
+
+
+def _history(count):
+    topics = ["python", "billing", "deployment", "travel", "databases", "music"]
+    for i in range(0, count, 2):
+        topic = topics[i % len(topics)]
+        yield {"role": "user", "content": f"Question {i} about {topic} and its setup"}
+        yield {"role": "assistant", "content": f"Answer {i}: notes on {topic}. " * 4}
+
+
+def bench_memory(sizes, turns):
+    """Memory retrieval and save latency per turn as MAX_MEMORY_SIZE grows."""
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            agent = make_agent(workdir, searches=0, memory_size=size)
+            memory = agent.memory.get(None)
+            history = list(_history(size))
+            start = time.perf_counter()
+            for i in range(0, len(history), 1000):
+                memory.add_messages(history[i : i + 1000])
+            fill_s = time.perf_counter() - start
+
+            agent.run("warm up")
+            retrieval, save, tokens = [], [], []
+            for i in range(turns):
+                result = agent.run(f"What did we say about databases, take {i}?")
+                retrieval.append(result["metrics"]["memory_retrieval_s"])
+                save.append(result["metrics"]["memory_save_s"])
+                tokens.append(result["context_tokens"])
+            emit(
+                {
+                    "benchmark": "memory",
+                    "max_memory_size": size,
+                    "turns": turns,
+                    "fill_s": round(fill_s, 3),
+                    **summarize(retrieval, "retrieval_"),
+                    **summarize(save, "save_"),
+                    "context_tokens_mean": round(statistics.fmean(tokens), 1),
+                }
+            )
+            agent.memory.close()
+
+
+def bench_files(count, size_kb):
+    """Throughput of the file tools on ``count`` files of ``size_kb`` each."""
+    from tools import (
+        copy_files,
+        delete_files,
+        list_directory,
+        read_file,
+        search_files,
+        write_files,
+    )
+
+    line = "lorem ipsum dolor sit amet consectetur adipiscing elit\n"
+    content = line * (size_kb * 1024 // len(line))
+    megabytes = count * len(content) / 1e6
+
+    with tempfile.TemporaryDirectory() as workdir:
+        src = os.path.join(workdir, "src")
+        paths = [os.path.join(src, f"file_{i:05d}.txt") for i in range(count)]
+        operations = [
+            (
+                "write_files",
+                megabytes,
+                lambda: write_files.invoke({"files": dict.fromkeys(paths, content)}),
+            ),
+            (
+                "read_file",
+                megabytes,
+                lambda: [read_file.invoke({"path": p}) for p in paths],
+            ),
+            (
+                "list_directory",
+                0,
+                lambda: list_directory.invoke({"path": src, "limit": count}),
+            ),
+            (
+                "search_files",
+                megabytes,
+                lambda: search_files.invoke(
+                    {
+                        "directory": src,
+                        "pattern": "*.txt",
+                        "content": "elit$",
+                        "limit": count,
+                    }
+                ),
+            ),
+            (
+                "copy_files",
+                megabytes,
+                lambda: copy_files.invoke(
+                    {
+                        "sources": [os.path.join(src, "*.txt")],
+                        "destination": os.path.join(workdir, "dst"),
+                    }
+                ),
+            ),
+            (
+                "delete_files",
+                0,
+                lambda: delete_files.invoke(
+                    {"paths": [os.path.join(workdir, "dst", "*.txt")]}
+                ),
+            ),
+        ]
+        for name, mb, operation in operations:
+            start = time.perf_counter()
+            operation()
+            seconds = time.perf_counter() - start
+            result = {
+                "benchmark": "files",
+                "op": name,
+                "files": count,
+                "file_kb": size_kb,
+                "seconds": round(seconds, 4),
+                "files_per_s": round(count / seconds, 1),
+            }
+            if mb:
+                result["mb_per_s"] = round(mb / seconds, 1)
+            emit(result)
+
+
+def bench_startup(repeats):
+    """Wall time of fresh processes: CLI startup and a ready-to-run agent."""
+    commands = {
+        "main.py --help": ["main.py", "--help"],
+        "agent ready": [
+            "-c",
+            "from agent import TaskAutomationAgent; TaskAutomationAgent().agent",
+        ],
+    }
+    for name, args in commands.items():
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, *args], cwd=ROOT, check=True, capture_output=True
+            )
+            times.append(time.perf_counter() - start)
+        emit(
+            {
+                "benchmark": "startup",
+                "command": name,
+                "repeats": repeats,
+                "min_s": round(min(times), 3),
+                "median_s": round(statistics.median(times), 3),
+            }
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline agent benchmarks")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--turns", type=int, default=50, help="Turns per setting")
+    parser.add_argument(
+        "--memory-sizes", type=int, nargs="+", default=[10, 100, 1000, 10000]
+    )
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--file-kb", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=5, help="Startup runs")
+    args = parser.parse_args()
+
+    if "turn" in args.suite:
+        bench_turns(args.turns)
+    if "memory" in args.suite:
+        bench_memory(args.memory_sizes, args.turns)
+    if "files" in args.suite:
+        bench_files(args.files, args.file_kb)
+    if "startup" in args.suite:
+        bench_startup(args.repeats)
+
+
+if __name__ == "__main__":
+    main()
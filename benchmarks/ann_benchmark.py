@@ -0,0 +1,108 @@
+"""Recall/latency benchmark for the IVF memory index against the exact scan.
+
+Usage:
+    python benchmarks/ann_benchmark.py --size 200000 --nprobe 1 4 8 16 32
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from tools.memory_manager import IVFIndex, NumpyVectorStore, _normalize_rows
+
+
+class _NoEmbeddings:
+    """Placeholder embeddings; the benchmark only searches by vector."""
+
+    size = 0
+
+
+def make_dataset(
+    size: int, dim: int, clusters: int, noise: float, seed: int = 0
+) -> np.ndarray:
+    """Clustered unit vectors, roughly shaped like topic-grouped conversations."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size)
+    jitter = rng.standard_normal((size, dim)).astype(np.float32)
+    return _normalize_rows(centers[labels] + noise * jitter)
+
+
+def measure(store: NumpyVectorStore, queries: np.ndarray, k: int):
+    """Return (result ids per query, latencies in ms)."""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = store.similarity_search_by_vector_with_score(query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({doc.id for doc, _ in hits})
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF vs exact memory search")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument(
+        "--noise", type=float, default=1.0, help="Spread within a cluster"
+    )
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    data = make_dataset(args.size + args.queries, args.dim, args.clusters, args.noise)
+    vectors, queries = data[: args.size], data[args.size :]
+    texts = [""] * args.size
+    ids = [str(i) for i in range(args.size)]
+
+    exact = NumpyVectorStore(embedding=_NoEmbeddings(), capacity=args.size)
+    exact.add_vectors(vectors, texts, ids=ids)
+    truth, exact_ms = measure(exact, queries, args.k)
+    print(
+        json.dumps(
+            {
+                "index": "exact",
+                "size": args.size,
+                "recall": 1.0,
+                "mean_ms": round(float(exact_ms.mean()), 3),
+                "p99_ms": round(float(np.percentile(exact_ms, 99)), 3),
+            }
+        )
+    )
+
+    index = IVFIndex(nlist=args.nlist, min_train_size=0)
+    start = time.perf_counter()
+    ivf = NumpyVectorStore(embedding=_NoEmbeddings(), capacity=args.size, index=index)
+    ivf.add_vectors(vectors, texts, ids=ids)
+    build_s = time.perf_counter() - start
+
+    for nprobe in args.nprobe:
+        index.nprobe = nprobe
+        found, ivf_ms = measure(ivf, queries, args.k)
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        print(
+            json.dumps(
+                {
+                    "index": "ivf",
+                    "size": args.size,
+                    "nlist": len(index.centroids),
+                    "nprobe": nprobe,
+                    "build_s": round(build_s, 2),
+                    "recall": round(float(recall), 4),
+                    "mean_ms": round(float(ivf_ms.mean()), 3),
+                    "p99_ms": round(float(np.percentile(ivf_ms, 99)), 3),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Deterministic stand-ins for the model and search backend.
+
+``ScriptedChatModel`` and ``FakeSearchProvider`` replace the ZhipuAI API and
+DuckDuckGo so benchmarks measure the agent itself and give the same
+workload on every run.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tools.search_providers import SearchProvider, register_provider
+
+USAGE = {"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Searches the web for the task ``searches`` times, then answers.
+
+    Each search is its own step, so a turn makes ``searches + 1`` model calls
+    and ``searches`` tool calls.
+    """
+
+    searches: int = 1
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        task = next(m.content for m in messages if m.type == "human")
+        done = sum(1 for m in messages if m.type == "tool")
+        if done < self.searches:
+            call = {
+                "name": "search_web",
+                "args": {"query": f"{task} #{done}"},
+                "id": f"call_{done}",
+            }
+            reply = AIMessage(content="", tool_calls=[call], usage_metadata=USAGE)
+        else:
+            reply = AIMessage(
+                content=f"Done after {done} searches.", usage_metadata=USAGE
+            )
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+class FakeSearchProvider(SearchProvider):
+    """Returns canned results derived from the query."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def search(self, query: str, num_results: int = 3) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return "\n\n".join(
+            f"{i + 1}. Result {i + 1} for {query}\n"
+            f"https://example.com/{i + 1}\nA short snippet about {query}."
+            for i in range(num_results)
+        )
+
+
+register_provider("fake", FakeSearchProvider)
@@ -0,0 +1,185 @@
+"""Iteration, wall-clock and per-tool budgets for agent runs.
+
+``BudgetMiddleware`` plugs into ``create_agent``. The run's deadline travels
+in the graph state (``deadline``, a ``time.time()`` timestamp), so one
+compiled graph can serve many runs. When a budget runs out the agent stops
+with an AI message whose ``response_metadata["budget_exhausted"]`` names the
+budget ("iterations" or "time"), and the agent turns that into a partial
+result.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Dict, Optional
+import asyncio
+import contextvars
+import threading
+import time
+
+from langchain.agents.middleware import AgentMiddleware, AgentState, hook_config
+from langchain.agents.middleware.types import ModelResponse
+from langchain_core.messages import AIMessage, ToolMessage
+from typing_extensions import NotRequired
+
+# Sync model and tool calls are waited on from here so they can be abandoned
+# at the deadline. Python can't kill a thread: an abandoned call keeps its
+# worker until it returns (model HTTP calls time out after 60s).
+_executor = ThreadPoolExecutor(max_workers=64, thread_name_prefix="budget")
+# Set once a sync call has been given up on, see call_abandoned()
+_abandoned: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "budget_abandoned", default=None
+)
+
+
+class BudgetState(AgentState):
+    deadline: NotRequired[float]
+
+
+def stop_message(budget: str, detail: str) -> AIMessage:
+    return AIMessage(
+        content=f"Stopped early: {detail}.",
+        response_metadata={"budget_exhausted": budget},
+    )
+
+
+def exhausted_budget(message) -> Optional[str]:
+    """The budget that stopped the run, if ``message`` is a stop message."""
+    return (getattr(message, "response_metadata", None) or {}).get("budget_exhausted")
+
+
+def call_abandoned() -> bool:
+    """Whether the caller already timed out the sync call running here.
+
+    Middleware that makes a call wait (e.g. for a concurrency slot) checks
+    this before going on, so a tool reported as timed out doesn't run late.
+    """
+    abandoned = _abandoned.get()
+    return abandoned is not None and abandoned.is_set()
+
+
+def _run_with_timeout(func, request, timeout: float):
+    # Copy the context so callbacks (telemetry, tracing) still see this run
+    context = contextvars.copy_context()
+    abandoned = threading.Event()
+    context.run(_abandoned.set, abandoned)
+    future = _executor.submit(context.run, func, request)
+    try:
+        return future.result(timeout=max(timeout, 0))
+    except FuturesTimeoutError:
+        abandoned.set()
+        future.cancel()  # in case it never left the executor's queue
+        raise
+
+
+class BudgetMiddleware(AgentMiddleware):
+    """Stops a run after ``max_iterations`` model calls or at its deadline.
+
+    Model calls are cut off at the deadline, and each tool call gets
+    ``tool_timeouts.get(name, tool_timeout)`` seconds (never past the
+    deadline); a tool that runs out of time returns an error to the model
+    instead of blocking the run.
+    """
+
+    state_schema = BudgetState
+
+    def __init__(
+        self,
+        max_iterations: int,
+        tool_timeout: Optional[float] = None,
+        tool_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        super().__init__()
+        self.max_iterations = max_iterations
+        self.tool_timeout = tool_timeout
+        self.tool_timeouts = dict(tool_timeouts or {})
+
+    # Part of compile_agent's cache key: agents with the same budgets share
+    # a graph, since the deadline itself travels in the state
+    def _settings(self):
+        return (
+            self.max_iterations,
+            self.tool_timeout,
+            tuple(sorted(self.tool_timeouts.items())),
+        )
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other._settings() == self._settings()
+
+    def __hash__(self):
+        return hash(self._settings())
+
+    @staticmethod
+    def _remaining(state) -> Optional[float]:
+        deadline = state.get("deadline")
+        return None if deadline is None else deadline - time.time()
+
+    @hook_config(can_jump_to=["end"])
+    def before_model(self, state, runtime):
+        calls = sum(1 for m in state["messages"] if isinstance(m, AIMessage))
+        if calls >= self.max_iterations:
+            message = stop_message(
+                "iterations", f"reached the limit of {self.max_iterations} steps"
+            )
+            return {"jump_to": "end", "messages": [message]}
+        remaining = self._remaining(state)
+        if remaining is not None and remaining <= 0:
+            message = stop_message("time", "ran out of time")
+            return {"jump_to": "end", "messages": [message]}
+        return None
+
+    @hook_config(can_jump_to=["end"])
+    async def abefore_model(self, state, runtime):
+        return self.before_model(state, runtime)
+
+    def wrap_model_call(self, request, handler):
+        remaining = self._remaining(request.state)
+        if remaining is None:
+            return handler(request)
+        try:
+            return _run_with_timeout(handler, request, remaining)
+        except FuturesTimeoutError:
+            return ModelResponse(result=[stop_message("time", "ran out of time")])
+
+    async def awrap_model_call(self, request, handler):
+        remaining = self._remaining(request.state)
+        if remaining is None:
+            return await handler(request)
+        try:
+            return await asyncio.wait_for(handler(request), max(remaining, 0))
+        except asyncio.TimeoutError:
+            return ModelResponse(result=[stop_message("time", "ran out of time")])
+
+    def _tool_timeout(self, request) -> Optional[float]:
+        timeout = self.tool_timeouts.get(request.tool_call["name"], self.tool_timeout)
+        remaining = self._remaining(request.state or {})
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    @staticmethod
+    def _timed_out(request, timeout: float) -> ToolMessage:
+        name = request.tool_call["name"]
+        return ToolMessage(
+            content=f"Error: {name} timed out after {timeout:.1f}s",
+            tool_call_id=request.tool_call["id"],
+            name=name,
+            status="error",
+        )
+
+    def wrap_tool_call(self, request, handler):
+        timeout = self._tool_timeout(request)
+        if timeout is None:
+            return handler(request)
+        try:
+            return _run_with_timeout(handler, request, timeout)
+        except FuturesTimeoutError:
+            return self._timed_out(request, timeout)
+
+    async def awrap_tool_call(self, request, handler):
+        timeout = self._tool_timeout(request)
+        if timeout is None:
+            return await handler(request)
+        try:
+            return await asyncio.wait_for(handler(request), max(timeout, 0))
+        except asyncio.TimeoutError:
+            return self._timed_out(request, timeout)
@@ -0,0 +1,138 @@
+"""In-memory LRU cache of strings with a TTL and optional SQLite tier.
+
+Shared by the search result cache (tools/search_tools.py) and the model
+response cache (llm_cache.py); they differ only in how keys are built and
+values serialized.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import sqlite3
+import threading
+import time
+
+
+class CacheStore:
+    """LRU cache of string values with a TTL and optional SQLite tier.
+
+    Hits are served from memory; on a memory miss the SQLite file (if
+    configured) is consulted and a live row is promoted back into memory, so
+    entries survive restarts. Expired rows are purged every 100 writes, along
+    with the least recently used rows beyond ``max_rows`` if it is set.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        max_entries: int,
+        ttl: float,
+        db_path: Optional[str] = None,
+        max_rows: Optional[int] = None,
+    ):
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            columns = [
+                row[1] for row in self._db.execute(f"PRAGMA table_info({table})")
+            ]
+            if "used_at" not in columns:
+                # Files written before rows tracked their last use
+                self._db.execute(
+                    f"ALTER TABLE {table} ADD COLUMN used_at REAL NOT NULL DEFAULT 0"
+                )
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS {table}_used ON {table} (used_at)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    f"SELECT value, expires_at FROM {self.table} "
+                    "WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        f"UPDATE {self.table} SET used_at = ? WHERE key = ?",
+                        (now, key),
+                    )
+                    self._db.commit()
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is None:
+                return
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.table} "
+                "(key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            self._writes += 1
+            # Purge now and then instead of counting rows on every write
+            if self._writes % 100 == 0:
+                self._purge(now)
+            self._db.commit()
+
+    def _purge(self, now: float):
+        self._db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+        if self.max_rows is not None:
+            self._db.execute(
+                f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM "
+                f"{self.table} ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_rows,),
+            )
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute(f"DELETE FROM {self.table}")
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
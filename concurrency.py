@@ -0,0 +1,84 @@
+"""Per-tool concurrency limits for agent runs.
+
+The agent graph already runs the tool calls of one step in parallel (each
+call is its own task), on a pool of at most ``max_concurrency`` threads from
+the run config. ``ToolConcurrencyMiddleware`` adds a cap per tool name on
+top, so for example no more than a few ``search_web`` calls hit the search
+provider at once, however many steps or runs are in flight.
+"""
+
+from typing import Dict, Tuple
+import asyncio
+import threading
+import weakref
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import ToolMessage
+
+from budgets import call_abandoned
+
+# Slots live here rather than on the middleware, so every agent and compiled
+# graph in the process shares them, keyed by (tool name, limit)
+_semaphores: Dict[Tuple[str, int], threading.BoundedSemaphore] = {}
+_async_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _semaphore(name: str, limit: int) -> threading.BoundedSemaphore:
+    with _lock:
+        semaphore = _semaphores.get((name, limit))
+        if semaphore is None:
+            semaphore = _semaphores[(name, limit)] = threading.BoundedSemaphore(limit)
+        return semaphore
+
+
+def _async_semaphore(name: str, limit: int) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        semaphores = _async_semaphores.setdefault(loop, {})
+        if (name, limit) not in semaphores:
+            semaphores[(name, limit)] = asyncio.Semaphore(limit)
+        return semaphores[(name, limit)]
+
+
+class ToolConcurrencyMiddleware(AgentMiddleware):
+    """Lets at most ``limits[name]`` calls of each listed tool run at once.
+
+    Calls over the limit wait for a slot; tools without a limit are not
+    affected. Sync calls share one set of slots per process, async calls
+    one set per event loop.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        super().__init__()
+        self.limits = {name: limit for name, limit in limits.items() if limit > 0}
+
+    # Part of compile_agent's cache key: agents with the same limits can
+    # share a graph, and the slots are shared either way
+    def __eq__(self, other):
+        return type(other) is type(self) and other.limits == self.limits
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.limits.items())))
+
+    def wrap_tool_call(self, request, handler):
+        name = request.tool_call["name"]
+        if name not in self.limits:
+            return handler(request)
+        with _semaphore(name, self.limits[name]):
+            if call_abandoned():
+                # Timed out while waiting for the slot; the model was told so
+                return ToolMessage(
+                    content="Error: skipped, the call already timed out",
+                    tool_call_id=request.tool_call["id"],
+                    name=request.tool_call["name"],
+                    status="error",
+                )
+            return handler(request)
+
+    async def awrap_tool_call(self, request, handler):
+        name = request.tool_call["name"]
+        if name not in self.limits:
+            return await handler(request)
+        async with _async_semaphore(name, self.limits[name]):
+            return await handler(request)
@@ -8,16 +8,59 @@ class Config:
     ZHIPUAI_API_KEY = os.getenv("ZHIPUAI_API_KEY")
     MODEL_NAME = "glm-4"
     TEMPERATURE = 0.01
-    MAX_ITERATIONS = 5
-    MAX_EXECUTION_TIME = 300
+    MAX_ITERATIONS = int(os.getenv("MAX_ITERATIONS", "5"))
+    MAX_EXECUTION_TIME = float(os.getenv("MAX_EXECUTION_TIME", "300"))
+    TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "60"))
+    TOOL_TIMEOUTS = os.getenv("TOOL_TIMEOUTS", "")
+    MAX_TOOL_CONCURRENCY = int(os.getenv("MAX_TOOL_CONCURRENCY", "8"))
+    TOOL_CONCURRENCY = os.getenv("TOOL_CONCURRENCY", "search_web=3")
     VERBOSE = True
 
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+    LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "86400"))
+    LLM_CACHE_FILE = os.getenv("LLM_CACHE_FILE", "")
+    LLM_CACHE_MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "10000"))
+
     SEARCH_PROVIDER = os.getenv("SEARCH_PROVIDER", "duckduckgo")
     TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+    SEARCH_MODE = os.getenv("SEARCH_MODE", "first")
+    SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "10"))
+    SEARCH_LATENCY_BUDGET = float(os.getenv("SEARCH_LATENCY_BUDGET", "3"))
+    SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+    SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+    SEARCH_CACHE_FILE = os.getenv("SEARCH_CACHE_FILE", "")
+
+    NOTIFY_SINKS = os.getenv("NOTIFY_SINKS", "stdout")
+    NOTIFY_FILE = os.getenv("NOTIFY_FILE", "notifications.jsonl")
+    NOTIFY_WEBHOOK_URL = os.getenv("NOTIFY_WEBHOOK_URL", "")
+    NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", "20"))
+    NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))
+
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+    SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "4"))
+    SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "64"))
+
+    METRICS_SINKS = os.getenv("METRICS_SINKS", "")
+    METRICS_FILE = os.getenv("METRICS_FILE", "metrics.jsonl")
+    METRICS_PROM_FILE = os.getenv("METRICS_PROM_FILE", "agent_metrics.prom")
 
     ENABLE_MEMORY = os.getenv("ENABLE_MEMORY", "false").lower() == "true"
     MEMORY_FILE = os.getenv("MEMORY_FILE", ".agent_memory.json")
     MAX_MEMORY_SIZE = int(os.getenv("MAX_MEMORY_SIZE", "10"))
+    MEMORY_DIR = os.getenv("MEMORY_DIR", ".agent_memory")
+    MAX_MEMORY_SHARDS = int(os.getenv("MAX_MEMORY_SHARDS", "64"))
+    MEMORY_INDEX = os.getenv("MEMORY_INDEX", "exact")
+    MEMORY_IVF_NPROBE = int(os.getenv("MEMORY_IVF_NPROBE", "8"))
+    # Token budget for retrieved conversation context (see build_context)
+    CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1000"))
+    CONTEXT_ENTRY_MAX_TOKENS = int(os.getenv("CONTEXT_ENTRY_MAX_TOKENS", "300"))
+    CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "8"))
+    CONTEXT_RECENCY_WEIGHT = float(os.getenv("CONTEXT_RECENCY_WEIGHT", "0.3"))
+    EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "hashing")
+    EMBEDDING_SIZE = int(os.getenv("EMBEDDING_SIZE", "384"))
 
     LANGCHAIN_TRACING = os.getenv("LANGCHAIN_TRACING", "false").lower() == "true"
     LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY")
@@ -28,19 +71,132 @@ class Config:
 
     @classmethod
     def get_search_provider(cls):
-        provider_name = cls.SEARCH_PROVIDER.lower()
+        from tools.search_providers import get_provider
+
+        names = [n.strip().lower() for n in cls.SEARCH_PROVIDER.split(",") if n.strip()]
+        if names == ["composite"]:
+            names = ["duckduckgo"] + (["tavily"] if cls.TAVILY_API_KEY else [])
+
+        if len(names) > 1:
+            members = tuple(
+                (name, tuple(sorted(cls._search_provider_kwargs(name).items())))
+                for name in names
+            )
+            return get_provider(
+                "composite",
+                members=members,
+                mode=cls.SEARCH_MODE,
+                timeout=cls.SEARCH_TIMEOUT,
+                latency_budget=cls.SEARCH_LATENCY_BUDGET,
+            )
+
+        name = names[0] if names else "duckduckgo"
+        return get_provider(name, **cls._search_provider_kwargs(name))
 
+    @classmethod
+    def _search_provider_kwargs(cls, provider_name):
         if provider_name == "tavily":
             if not cls.TAVILY_API_KEY:
                 raise ValueError("TAVILY_API_KEY required for Tavily provider")
-            from tools.search_providers.tavily import TavilyProvider
+            return {"api_key": cls.TAVILY_API_KEY}
+        return {}
+
+    @classmethod
+    def get_search_cache(cls):
+        if not cls.SEARCH_CACHE_ENABLED:
+            return None
+        from tools.search_tools import SearchCache
+
+        return SearchCache(
+            max_entries=cls.SEARCH_CACHE_SIZE,
+            ttl=cls.SEARCH_CACHE_TTL,
+            db_path=cls.SEARCH_CACHE_FILE or None,
+        )
+
+    @classmethod
+    def get_tool_timeouts(cls):
+        """Per-tool overrides of TOOL_TIMEOUT, from "name=seconds,..."."""
+        timeouts = {}
+        for item in cls.TOOL_TIMEOUTS.split(","):
+            if item.strip():
+                name, _, seconds = item.partition("=")
+                timeouts[name.strip()] = float(seconds)
+        return timeouts
+
+    @classmethod
+    def get_tool_concurrency(cls):
+        """Per-tool limits on concurrent calls, from "name=calls,..."."""
+        limits = {}
+        for item in cls.TOOL_CONCURRENCY.split(","):
+            if item.strip():
+                name, _, calls = item.partition("=")
+                limits[name.strip()] = int(calls)
+        return limits
+
+    @classmethod
+    def get_llm_cache(cls):
+        if not cls.LLM_CACHE_ENABLED:
+            return None
+        from llm_cache import shared_cache
+
+        return shared_cache(
+            max_entries=cls.LLM_CACHE_SIZE,
+            ttl=cls.LLM_CACHE_TTL,
+            db_path=cls.LLM_CACHE_FILE or None,
+            max_rows=cls.LLM_CACHE_MAX_ROWS,
+        )
+
+    @classmethod
+    def get_notification_sinks(cls):
+        from tools.notifications import FileSink, StdoutSink, WebhookSink
+
+        sinks = []
+        for name in cls.NOTIFY_SINKS.split(","):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name == "stdout":
+                sinks.append(StdoutSink())
+            elif name == "file":
+                sinks.append(FileSink(cls.NOTIFY_FILE))
+            elif name == "webhook":
+                if not cls.NOTIFY_WEBHOOK_URL:
+                    raise ValueError("NOTIFY_WEBHOOK_URL required for webhook sink")
+                sinks.append(WebhookSink(cls.NOTIFY_WEBHOOK_URL))
+            else:
+                raise ValueError(f"Unknown notification sink: {name}")
+        return sinks
+
+    @classmethod
+    def get_metrics_sinks(cls):
+        names = [n.strip().lower() for n in cls.METRICS_SINKS.split(",") if n.strip()]
+        if not names:
+            return []
+        from telemetry import JsonlMetricsSink, PrometheusTextfileSink
+
+        sinks = []
+        for name in names:
+            if name == "jsonl":
+                sinks.append(JsonlMetricsSink(cls.METRICS_FILE))
+            elif name == "prometheus":
+                sinks.append(PrometheusTextfileSink(cls.METRICS_PROM_FILE))
+            else:
+                raise ValueError(f"Unknown metrics sink: {name}")
+        return sinks
+
+    @classmethod
+    def get_embeddings(cls):
+        provider_name = cls.EMBEDDING_PROVIDER.lower()
+
+        if provider_name == "hashing":
+            from tools.embeddings import HashingEmbeddings
 
-            return TavilyProvider(cls.TAVILY_API_KEY)
+            return HashingEmbeddings(size=cls.EMBEDDING_SIZE)
 
-        elif provider_name == "duckduckgo":
-            from tools.search_providers.duckduckgo import DuckDuckGoProvider
+        elif provider_name == "fake":
+            from langchain_core.embeddings import FakeEmbeddings
 
-            return DuckDuckGoProvider()
+            return FakeEmbeddings(size=cls.EMBEDDING_SIZE)
 
         else:
-            raise ValueError(f"Unknown search provider: {provider_name}")
+            raise ValueError(f"Unknown embedding provider: {provider_name}")
@@ -0,0 +1,99 @@
+"""Response cache for the agent's chat model.
+
+LangChain looks the cache up with the serialized conversation as
+``prompt`` and a description of the model as ``llm_string`` (model name,
+temperature, bound tool schemas, stop words), so a hit means the same model
+was asked the same thing with the same tools.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+import hashlib
+import json
+import threading
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from cache_store import CacheStore
+
+
+def _dump(generations: Sequence[Generation]) -> str:
+    items = []
+    for generation in generations:
+        item = {"generation_info": generation.generation_info}
+        if isinstance(generation, ChatGeneration):
+            item["message"] = message_to_dict(generation.message)
+        else:
+            item["text"] = generation.text
+        items.append(item)
+    return json.dumps(items)
+
+
+def _load(value: str) -> list:
+    generations = []
+    for item in json.loads(value):
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            generations.append(
+                ChatGeneration(message=message, generation_info=item["generation_info"])
+            )
+        else:
+            generations.append(
+                Generation(text=item["text"], generation_info=item["generation_info"])
+            )
+    return generations
+
+
+class LLMResponseCache(CacheStore, BaseCache):
+    """LRU cache of model responses with a TTL and optional SQLite tier.
+
+    Responses are kept serialized, so every hit returns fresh objects. The
+    SQLite file holds at most ``max_rows`` responses; the least recently
+    used are deleted beyond that.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: float = 86400,
+        db_path: Optional[str] = None,
+        max_rows: int = 10000,
+    ):
+        super().__init__("llm_cache", max_entries, ttl, db_path, max_rows)
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(llm_string.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[list]:
+        value = self.get(self.make_key(prompt, llm_string))
+        return None if value is None else _load(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]):
+        self.set(self.make_key(prompt, llm_string), _dump(return_val))
+
+    def clear(self, **kwargs: Any):
+        super().clear()
+
+
+_shared: Dict[tuple, LLMResponseCache] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_cache(**settings) -> LLMResponseCache:
+    """One cache per distinct settings, shared by every agent in the process.
+
+    Sharing also lets agents with the same configuration share a compiled
+    graph, since the cache is part of the model's settings.
+    """
+    key = tuple(sorted(settings.items()))
+    with _shared_lock:
+        cache = _shared.get(key)
+        if cache is None:
+            cache = _shared[key] = LLMResponseCache(**settings)
+        return cache
@@ -0,0 +1,131 @@
+"""ZhipuAI chat model that reuses its HTTP connections.
+
+The stock ``ChatZhipuAI`` opens a new ``httpx`` client, and so a new TLS
+connection, for every call, and signs a new JWT each time.
+``PooledChatZhipuAI`` sends the same requests through shared keep-alive
+clients: one for sync calls per process and one for async calls per event
+loop (an ``httpx.AsyncClient`` can't move between loops). Streaming calls
+still go through the stock implementation.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import atexit
+import threading
+import time
+import weakref
+
+import httpx
+from langchain_community.chat_models import ChatZhipuAI
+from langchain_community.chat_models.zhipuai import (
+    API_TOKEN_TTL_SECONDS,
+    _get_jwt_token,
+    _truncate_params,
+)
+from langchain_core.outputs import ChatResult
+
+HTTP_TIMEOUT = 60
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+_client: Optional[httpx.Client] = None
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_tokens: Dict[str, Tuple[float, str]] = {}
+_lock = threading.Lock()
+
+
+def _token(api_key: str) -> str:
+    # Tokens are valid for API_TOKEN_TTL_SECONDS; re-sign at half of that
+    now = time.time()
+    with _lock:
+        cached = _tokens.get(api_key)
+        if cached is None or cached[0] <= now:
+            cached = (now + API_TOKEN_TTL_SECONDS / 2, _get_jwt_token(api_key))
+            _tokens[api_key] = cached
+        return cached[1]
+
+
+def http_client() -> httpx.Client:
+    """The process-wide keep-alive client for sync calls."""
+    global _client
+    with _lock:
+        if _client is None:
+            _client = httpx.Client(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+        return _client
+
+
+def async_http_client() -> httpx.AsyncClient:
+    """The keep-alive client for async calls on the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+            _async_clients[loop] = client
+        return client
+
+
+async def aclose_http_client():
+    """Close the running loop's async client, e.g. when a server shuts down."""
+    with _lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+@atexit.register
+def close_http_client():
+    global _client
+    with _lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+class PooledChatZhipuAI(ChatZhipuAI):
+    """``ChatZhipuAI`` whose non-streaming calls use pooled connections."""
+
+    def _request(self, messages, stop, kwargs) -> Tuple[Dict, Dict]:
+        if self.zhipuai_api_key is None:
+            raise ValueError("Did not find zhipuai_api_key.")
+        message_dicts, params = self._create_message_dicts(messages, stop)
+        payload = {**params, **kwargs, "messages": message_dicts, "stream": False}
+        _truncate_params(payload)
+        headers = {
+            "Authorization": _token(self.zhipuai_api_key),
+            "Accept": "application/json",
+        }
+        return payload, headers
+
+    def _generate(
+        self,
+        messages: List,
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        stream: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if stream if stream is not None else self.streaming:
+            return super()._generate(messages, stop, run_manager, True, **kwargs)
+        payload, headers = self._request(messages, stop, kwargs)
+        response = http_client().post(
+            self.zhipuai_api_base, json=payload, headers=headers
+        )
+        response.raise_for_status()
+        return self._create_chat_result(response.json())
+
+    async def _agenerate(
+        self,
+        messages: List,
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        stream: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if stream if stream is not None else self.streaming:
+            return await super()._agenerate(messages, stop, run_manager, True, **kwargs)
+        payload, headers = self._request(messages, stop, kwargs)
+        response = await async_http_client().post(
+            self.zhipuai_api_base, json=payload, headers=headers
+        )
+        response.raise_for_status()
+        return self._create_chat_result(response.json())
@@ -1,11 +1,71 @@
 import argparse
+import asyncio
+import json
 import sys
+import time
+from pathlib import Path
 
 sys.path.insert(0, ".")
-from agent import TaskAutomationAgent
 
 
-def interactive_mode(agent):
+def _print_metrics(result):
+    metrics = result.get("metrics")
+    if not metrics or not metrics["tool_calls"]:
+        return
+    print(
+        f"\n📋 Steps taken: {metrics['tool_calls']} tool calls, "
+        f"{metrics['llm_calls']} LLM calls in {metrics['total_s']:.1f}s "
+        f"(LLM {metrics['llm_s']:.1f}s, tools {metrics['tools_s']:.1f}s, "
+        f"{metrics['total_tokens']} tokens)"
+    )
+
+
+def _shorten(text, limit=120):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _print_result(result):
+    if result["success"]:
+        print(f"\n✅ Result:\n{result['output']}")
+        _print_metrics(result)
+    else:
+        print(f"\n❌ Error: {result['error']}")
+        if result.get("partial") and result["output"]:
+            print(f"\n📝 Partial result:\n{result['output']}")
+
+
+def _stream_task(agent, task, session_id=None):
+    """Run a task, printing model output and tool calls as they happen."""
+    result = {"success": False, "error": "No result"}
+    in_text = False
+    for event in agent.stream(task, session_id=session_id):
+        kind = event["type"]
+        if kind == "token":
+            if not in_text:
+                print("\n🤖 ", end="")
+                in_text = True
+            print(event["content"], end="", flush=True)
+        elif kind == "tool_call":
+            args = json.dumps(event["args"], ensure_ascii=False)
+            print(f"\n🔧 {event['name']}({_shorten(args)})", flush=True)
+            in_text = False
+        elif kind == "tool_result":
+            print(f"   ↳ {_shorten(event['content'])}", flush=True)
+        elif kind == "result":
+            result = event["result"]
+    print()
+
+    # The answer was already printed token by token
+    if result["success"]:
+        print("\n✅ Done")
+        _print_metrics(result)
+    else:
+        _print_result(result)
+    return result
+
+
+def interactive_mode(agent, session_id=None, stream=True):
     """Run agent in interactive mode."""
     print("🤖 Starter Agent with GLM 4.7")
     print("Type your tasks or 'quit' to exit\n")
@@ -21,15 +81,11 @@ def interactive_mode(agent):
             if not task:
                 continue
 
-            print("\n⏳ Processing...")
-            result = agent.run(task)
-
-            if result["success"]:
-                print(f"\n✅ Result:\n{result['output']}")
-                if result["steps"]:
-                    print(f"\n📋 Steps taken: {len(result['steps'])}")
+            if stream:
+                _stream_task(agent, task, session_id)
             else:
-                print(f"\n❌ Error: {result['error']}")
+                print("\n⏳ Processing...")
+                _print_result(agent.run(task, session_id=session_id))
 
             print()
 
@@ -40,17 +96,154 @@ def interactive_mode(agent):
             print(f"\n❌ Unexpected error: {str(e)}\n")
 
 
-def single_task_mode(agent, task):
+def single_task_mode(agent, task, session_id=None, stream=True):
     """Execute a single task and exit."""
     print(f"⏳ Processing: {task}")
-    result = agent.run(task)
-
-    if result["success"]:
-        print(f"\n✅ Result:\n{result['output']}")
-        if result["steps"]:
-            print(f"\n📋 Steps taken: {len(result['steps'])}")
+    if stream:
+        _stream_task(agent, task, session_id)
     else:
-        print(f"\n❌ Error: {result['error']}")
+        _print_result(agent.run(task, session_id=session_id))
+
+
+def _completed_task_ids(output_file):
+    """IDs of tasks that already succeeded in a (possibly partial) output file."""
+    done = set()
+    if not Path(output_file).exists():
+        return done
+    with open(output_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from an interrupted run
+            if record.get("success"):
+                done.add(str(record.get("id")))
+    return done
+
+
+def _read_tasks(tasks_file):
+    """Yield task dicts from a JSONL file, one task per line.
+
+    A line is either a JSON object with "task" and optional "id" and
+    "session_id", or plain task text. IDs default to the line number.
+    """
+    with open(tasks_file, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                item = line
+            if not isinstance(item, dict):
+                item = {"task": str(item)}
+            item["id"] = str(item.get("id", line_no))
+            yield item
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(
+        len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1)))
+    )
+    return sorted_values[index]
+
+
+async def _run_batch(agent, tasks_file, output_file, concurrency):
+    done = _completed_task_ids(output_file)
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    latencies = []
+    stats = {"succeeded": 0, "failed": 0, "skipped": 0}
+
+    async def produce():
+        for item in _read_tasks(tasks_file):
+            if item["id"] in done:
+                stats["skipped"] += 1
+                continue
+            await queue.put(item)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work(out):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            start = time.perf_counter()
+            if "task" in item:
+                result = await agent.arun(
+                    item["task"], session_id=item.get("session_id")
+                )
+            else:
+                result = {"success": False, "error": "Missing 'task' field"}
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            stats["succeeded" if result.get("success") else "failed"] += 1
+
+            record = {"id": item["id"], "latency_s": round(latency, 4), **result}
+            out.write(json.dumps(record, default=str) + "\n")
+            out.flush()
+
+    start = time.perf_counter()
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "a+", encoding="utf-8") as out:
+        # Start on a fresh line if the previous run died mid-record
+        if out.tell() > 0:
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+        await asyncio.gather(produce(), *(work(out) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    completed = stats["succeeded"] + stats["failed"]
+    stats.update(
+        {
+            "completed": completed,
+            "elapsed_s": elapsed,
+            "throughput": completed / elapsed if elapsed > 0 else 0.0,
+            "p50_s": _percentile(latencies, 50),
+            "p90_s": _percentile(latencies, 90),
+            "p99_s": _percentile(latencies, 99),
+        }
+    )
+    return stats
+
+
+def batch_mode(agent, tasks_file, output_file, concurrency=8):
+    """Run every task in a JSONL file, appending results as they finish.
+
+    Tasks that already succeeded in ``output_file`` are skipped, so an
+    interrupted batch can be resumed by running the same command again.
+    """
+    print(f"⏳ Running {tasks_file} with concurrency {concurrency} → {output_file}")
+    stats = asyncio.run(_run_batch(agent, tasks_file, output_file, concurrency))
+
+    print(
+        f"\n✅ {stats['succeeded']} succeeded, ❌ {stats['failed']} failed, "
+        f"⏭️  {stats['skipped']} skipped"
+    )
+    print(
+        f"📊 {stats['completed']} tasks in {stats['elapsed_s']:.1f}s "
+        f"({stats['throughput']:.2f} tasks/s)"
+    )
+    print(
+        f"⏱️  Latency p50 {stats['p50_s']:.2f}s, p90 {stats['p90_s']:.2f}s, "
+        f"p99 {stats['p99_s']:.2f}s"
+    )
+    return stats
+
+
+def _positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 def main():
@@ -61,17 +254,46 @@ def main():
     parser.add_argument(
         "--verbose", "-v", action="store_true", help="Enable verbose output"
     )
+    parser.add_argument(
+        "--session", "-s", type=str, help="Session ID for per-session memory"
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="Print the answer when the task finishes instead of as it is generated",
+    )
+    parser.add_argument(
+        "--batch", "-b", type=str, help="JSONL file of tasks to run in batch mode"
+    )
+    parser.add_argument(
+        "--concurrency",
+        "-c",
+        type=_positive_int,
+        default=8,
+        help="Tasks in flight at once in batch mode (default: 8)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=str,
+        default="results.jsonl",
+        help="JSONL file batch results are appended to (default: results.jsonl)",
+    )
 
     args = parser.parse_args()
 
+    # Imported here so --help doesn't pay for loading LangChain
+    from agent import TaskAutomationAgent
     from config import Config
 
     agent = TaskAutomationAgent(Config)
 
-    if args.task:
-        single_task_mode(agent, args.task)
+    if args.batch:
+        batch_mode(agent, args.batch, args.output, args.concurrency)
+    elif args.task:
+        single_task_mode(agent, args.task, args.session, stream=not args.no_stream)
     else:
-        interactive_mode(agent)
+        interactive_mode(agent, args.session, stream=not args.no_stream)
 
 
 if __name__ == "__main__":
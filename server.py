@@ -0,0 +1,324 @@
+"""Long-running HTTP/JSON service around a pool of warm agents.
+
+Start it with ``python server.py`` and send tasks instead of spawning
+``main.py`` per task:
+
+    POST /run      {"task": "...", "session_id": "..."}  -> the run() result
+    GET  /health   pool and queue status
+    GET  /metrics  Prometheus text format
+
+Agents are built, and their graphs compiled, once at startup. Each worker
+owns one agent and takes requests from a bounded queue; when the queue is
+full the server answers 503 with ``Retry-After`` instead of piling up work.
+Model calls share keep-alive connections (see llm_client.py). Connections
+from clients are kept alive too.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+sys.path.insert(0, ".")
+
+from config import Config
+
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 60.0
+# How often a waiting request checks whether its client hung up
+DISCONNECT_POLL = 0.1
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AgentServer:
+    """Serves agent runs over HTTP with a fixed pool of agents.
+
+    Args:
+        config: Config class for the agents.
+        workers: Agents in the pool, i.e. runs in progress at once.
+        max_queue: Requests allowed to wait for an agent before 503.
+
+    Raises:
+        ValueError: If ``workers`` or ``max_queue`` is below 1.
+    """
+
+    def __init__(
+        self,
+        config=None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: int = 4,
+        max_queue: int = 64,
+    ):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        if max_queue < 1:
+            # asyncio.Queue(maxsize=0) is unbounded and would never answer 503
+            raise ValueError(f"max_queue must be at least 1, got {max_queue}")
+        self.config = config or Config
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_queue = max_queue
+        self.agents = []
+        self.queue: Optional[asyncio.Queue] = None
+        self.started = time.time()
+        self.in_flight = 0
+        self.requests: Dict[int, int] = {}
+        self.rejected = 0
+        self.abandoned = 0
+        self.run_metrics = None
+        self._server = None
+        self._tasks = []
+
+    def build_agents(self):
+        """Create the agents and compile their graph ahead of the first request."""
+        from agent import TaskAutomationAgent
+        from telemetry import PrometheusMetrics
+
+        self.run_metrics = PrometheusMetrics()
+        for _ in range(self.workers):
+            agent = TaskAutomationAgent(self.config)
+            if self.agents:
+                # One memory pool, so a session is never loaded twice
+                agent.memory = self.agents[0].memory
+            agent.metrics_sinks = [*agent.metrics_sinks, self.run_metrics]
+            agent.agent  # compile now rather than on the first request
+            self.agents.append(agent)
+
+    async def start(self):
+        if not self.agents:
+            await asyncio.to_thread(self.build_agents)
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._work(a)) for a in self.agents]
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        from llm_client import aclose_http_client
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await aclose_http_client()
+
+    async def serve_forever(self):
+        await self.start()
+        print(
+            f"🤖 Serving {self.workers} agents on http://{self.host}:{self.port} "
+            f"(queue {self.max_queue})"
+        )
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _work(self, agent):
+        while True:
+            task, session_id, future = await self.queue.get()
+            if future.cancelled():
+                continue  # client hung up while queued
+            self.in_flight += 1
+            try:
+                result = await agent.arun(task, session_id=session_id)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            finally:
+                self.in_flight -= 1
+            if not future.cancelled():
+                future.set_result(result)
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), IDLE_TIMEOUT
+                    )
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload, extra = await self._handle(method, path, body, reader)
+                await self._respond(writer, status, payload, keep_alive, extra)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    async def _handle(self, method: str, path: str, body: bytes, reader) -> Tuple:
+        routes = {
+            "/run": ("POST", self._run),
+            "/health": ("GET", self._health),
+            "/metrics": ("GET", self._metrics),
+        }
+        if path not in routes:
+            return self._count(404, {"error": f"Unknown path: {path}"})
+        allowed, handler = routes[path]
+        if method != allowed:
+            return self._count(405, {"error": f"Use {allowed} for {path}"})
+        try:
+            return self._count(*(await handler(body, reader)))
+        except HTTPError as e:
+            return self._count(e.status, {"error": str(e)})
+
+    def _count(self, status: int, payload, extra: Optional[Dict] = None) -> Tuple:
+        self.requests[status] = self.requests.get(status, 0) + 1
+        return status, payload, extra or {}
+
+    async def _run(self, body: bytes, reader):
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(request, dict) or not isinstance(request.get("task"), str):
+            raise HTTPError(400, "Missing 'task' field")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((request["task"], request.get("session_id"), future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return 503, {"error": "Server busy, retry later"}, {"Retry-After": "1"}
+
+        # A queued request whose client hung up is dropped before it takes an
+        # agent; a run that already started finishes and its result is lost
+        while not future.done():
+            if reader.at_eof():
+                future.cancel()
+                self.abandoned += 1
+                raise ConnectionResetError("client disconnected")
+            await asyncio.wait([future], timeout=DISCONNECT_POLL)
+        return 200, future.result()
+
+    async def _health(self, body: bytes, reader):
+        return 200, {
+            "status": "ok",
+            "agents": len(self.agents),
+            "in_flight": self.in_flight,
+            "queued": self.queue.qsize(),
+            "max_queue": self.max_queue,
+            "uptime_s": round(time.time() - self.started, 3),
+        }
+
+    async def _metrics(self, body: bytes, reader):
+        lines = [
+            "# TYPE agent_server_requests_total counter",
+            *(
+                f'agent_server_requests_total{{status="{status}"}} {count}'
+                for status, count in sorted(self.requests.items())
+            ),
+            "# TYPE agent_server_rejected_total counter",
+            f"agent_server_rejected_total {self.rejected}",
+            "# TYPE agent_server_abandoned_total counter",
+            f"agent_server_abandoned_total {self.abandoned}",
+            "# TYPE agent_server_in_flight gauge",
+            f"agent_server_in_flight {self.in_flight}",
+            "# TYPE agent_server_queued gauge",
+            f"agent_server_queued {self.queue.qsize()}",
+        ]
+        runs = self.run_metrics.render() if self.run_metrics else ""
+        return 200, "\n".join(lines) + "\n" + runs
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive, extra=None):
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, default=str).encode("utf-8")
+            content_type = "application/json"
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **(extra or {}),
+        }
+        head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the agent over HTTP")
+    parser.add_argument("--host", default=Config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=Config.SERVER_WORKERS,
+        help=f"Agents serving requests at once (default: {Config.SERVER_WORKERS})",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=Config.SERVER_MAX_QUEUE,
+        help="Requests waiting for an agent before the server answers 503 "
+        f"(default: {Config.SERVER_MAX_QUEUE})",
+    )
+    args = parser.parse_args()
+
+    try:
+        server = AgentServer(Config, args.host, args.port, args.workers, args.max_queue)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nGoodbye! 👋")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Per-run latency and token telemetry for the agent.
+
+``RunTelemetry`` is a LangChain callback handler that times every model and
+tool call of one run; the agent adds memory phases around it and reports
+the result as ``result["metrics"]``. Finished runs are also handed to any
+configured ``MetricsSink`` (JSONL file, Prometheus textfile).
+"""
+
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+import json
+import os
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+PHASES = ("memory_retrieval", "llm", "tools", "memory_save")
+
+
+class RunTelemetry(BaseCallbackHandler):
+    """Collects timings and token counts for a single agent run.
+
+    Tool calls of one step may run in parallel, so ``tools_s`` is the sum of
+    their durations and can exceed their share of the wall time.
+    """
+
+    # Record callbacks as they happen instead of on LangChain's executor
+    run_inline = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.llm_calls = 0
+        self.tokens = {"prompt": 0, "completion": 0, "total": 0}
+        self.tool_calls: List[Dict] = []
+        self._pending: Dict = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    def _add(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] += seconds
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._pending[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._pending[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish_llm(run_id)
+        prompt, completion = _token_usage(response)
+        with self._lock:
+            self.tokens["prompt"] += prompt
+            self.tokens["completion"] += completion
+            self.tokens["total"] += prompt + completion
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish_llm(run_id)
+
+    def _finish_llm(self, run_id):
+        start = self._pending.pop(run_id, None)
+        if start is not None:
+            self._add("llm", time.perf_counter() - start)
+            with self._lock:
+                self.llm_calls += 1
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._pending[run_id] = (name, time.perf_counter())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=False)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish_tool(run_id, error=True)
+
+    def _finish_tool(self, run_id, error: bool):
+        pending = self._pending.pop(run_id, None)
+        if pending is None:
+            return
+        name, start = pending
+        seconds = time.perf_counter() - start
+        self._add("tools", seconds)
+        with self._lock:
+            self.tool_calls.append(
+                {"name": name, "duration_s": round(seconds, 6), "error": error}
+            )
+
+    def metrics(self, success: bool = True) -> Dict:
+        total = time.perf_counter() - self.started
+        with self._lock:
+            phases = {f"{name}_s": round(s, 6) for name, s in self.phases.items()}
+            measured = sum(self.phases.values())
+            return {
+                "success": success,
+                "total_s": round(total, 6),
+                **phases,
+                # Agent graph, prompt building and anything else unaccounted for
+                "overhead_s": round(max(total - measured, 0.0), 6),
+                "llm_calls": self.llm_calls,
+                "tool_calls": len(self.tool_calls),
+                "prompt_tokens": self.tokens["prompt"],
+                "completion_tokens": self.tokens["completion"],
+                "total_tokens": self.tokens["total"],
+                "tools": list(self.tool_calls),
+            }
+
+
+def _token_usage(response) -> tuple:
+    """(prompt, completion) tokens from an LLMResult, 0 if not reported."""
+    prompt = completion = 0
+    found = False
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+                found = True
+    if not found:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt = usage.get("prompt_tokens", 0)
+        completion = usage.get("completion_tokens", 0)
+    return prompt, completion
+
+
+class MetricsSink(ABC):
+    """Receives the metrics dict of every finished run."""
+
+    @abstractmethod
+    def emit(self, metrics: Dict) -> None:
+        pass
+
+
+class JsonlMetricsSink(MetricsSink):
+    """Appends one JSON line per run."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, metrics: Dict) -> None:
+        line = json.dumps({"timestamp": time.time(), **metrics}) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+class PrometheusMetrics(MetricsSink):
+    """Keeps running totals of all runs, rendered in the Prometheus text format."""
+
+    def __init__(self, prefix: str = "agent"):
+        self.prefix = prefix
+        self._runs = defaultdict(int)
+        self._phase_seconds = defaultdict(float)
+        self._tool_calls = defaultdict(int)
+        self._tool_seconds = defaultdict(float)
+        self._tokens = defaultdict(int)
+        self._run_seconds = 0.0
+        self._llm_calls = 0
+        self._lock = threading.Lock()
+
+    def emit(self, metrics: Dict) -> None:
+        with self._lock:
+            self._record(metrics)
+
+    def render(self) -> str:
+        with self._lock:
+            return self._render()
+
+    def _record(self, metrics: Dict):
+        self._runs["success" if metrics.get("success") else "error"] += 1
+        self._run_seconds += metrics.get("total_s", 0.0)
+        for phase in PHASES + ("overhead",):
+            self._phase_seconds[phase] += metrics.get(f"{phase}_s", 0.0)
+        self._llm_calls += metrics.get("llm_calls", 0)
+        for kind in ("prompt", "completion"):
+            self._tokens[kind] += metrics.get(f"{kind}_tokens", 0)
+        for call in metrics.get("tools", []):
+            self._tool_calls[call["name"]] += 1
+            self._tool_seconds[call["name"]] += call["duration_s"]
+
+    def _render(self) -> str:
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_runs_total Agent runs by outcome.",
+            f"# TYPE {p}_runs_total counter",
+        ]
+        lines += [f'{p}_runs_total{{status="{k}"}} {v}' for k, v in self._runs.items()]
+        lines += [
+            f"# HELP {p}_run_seconds_total Wall time of all runs.",
+            f"# TYPE {p}_run_seconds_total counter",
+            f"{p}_run_seconds_total {self._run_seconds:.6f}",
+            f"# HELP {p}_phase_seconds_total Wall time spent per run phase.",
+            f"# TYPE {p}_phase_seconds_total counter",
+        ]
+        lines += [
+            f'{p}_phase_seconds_total{{phase="{k}"}} {v:.6f}'
+            for k, v in self._phase_seconds.items()
+        ]
+        lines += [
+            f"# TYPE {p}_llm_calls_total counter",
+            f"{p}_llm_calls_total {self._llm_calls}",
+            f"# TYPE {p}_tokens_total counter",
+        ]
+        lines += [
+            f'{p}_tokens_total{{type="{k}"}} {v}' for k, v in self._tokens.items()
+        ]
+        lines.append(f"# TYPE {p}_tool_calls_total counter")
+        lines += [
+            f'{p}_tool_calls_total{{tool="{k}"}} {v}'
+            for k, v in self._tool_calls.items()
+        ]
+        lines.append(f"# TYPE {p}_tool_seconds_total counter")
+        lines += [
+            f'{p}_tool_seconds_total{{tool="{k}"}} {v:.6f}'
+            for k, v in self._tool_seconds.items()
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusTextfileSink(PrometheusMetrics):
+    """Rewrites a Prometheus textfile with the running totals after each run.
+
+    Point node_exporter's textfile collector (or any scraper reading the
+    text format) at ``path``. The file is replaced atomically.
+    """
+
+    def __init__(self, path: str, prefix: str = "agent"):
+        super().__init__(prefix)
+        self.path = path
+
+    def emit(self, metrics: Dict) -> None:
+        with self._lock:
+            self._record(metrics)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self._render())
+            os.replace(tmp_path, self.path)
+
+
+def emit(sinks: List[MetricsSink], metrics: Dict):
+    """Send ``metrics`` to every sink; a failing sink never fails the run."""
+    for sink in sinks:
+        try:
+            sink.emit(metrics)
+        except Exception:
+            pass
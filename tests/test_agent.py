@@ -1,10 +1,40 @@
 import sys
 
 sys.path.insert(0, "..")
+import asyncio
+import time
+from typing import Callable
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
 from agent import TaskAutomationAgent
 from config import Config
 
 
+class ScriptedModel(BaseChatModel):
+    """Offline chat model whose replies come from ``script(messages)``."""
+
+    script: Callable[[list], AIMessage]
+    delay: float = 0.0
+
+    @property
+    def _llm_type(self):
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=self.script(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        return ChatResult(generations=[ChatGeneration(message=self.script(messages))])
+
+
 def test_basic_task():
     """Test agent with simple task."""
     agent = TaskAutomationAgent(Config)
@@ -40,8 +70,333 @@ def test_custom_tool():
     print("✅ Custom tool test passed")
 
 
+def _echo(messages):
+    return AIMessage(content=f"Done: {messages[-1].content}")
+
+
+def _time_then_answer(messages):
+    """Calls get_current_time once, then answers."""
+    usage = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+    if messages[-1].type == "tool":
+        return AIMessage(content="It is late.", usage_metadata=usage)
+    call = {"name": "get_current_time", "args": {}, "id": "call_1"}
+    return AIMessage(content="", tool_calls=[call], usage_metadata=usage)
+
+
+def _offline_agent(delay: float = 0.0, config=Config):
+    """Agent whose model echoes the task back without calling the API."""
+    import os
+
+    saved_key = os.environ.get("ZHIPUAI_API_KEY")
+    os.environ["ZHIPUAI_API_KEY"] = saved_key or "offline.test"
+    try:
+        agent = TaskAutomationAgent(config)
+    finally:
+        if saved_key is None:
+            del os.environ["ZHIPUAI_API_KEY"]
+    agent.llm = ScriptedModel(script=_echo, delay=delay)
+    return agent
+
+
+def test_async_batch():
+    """Test arun/abatch keep many tasks in flight without the live API."""
+    agent = _offline_agent(delay=0.2)
+
+    result = asyncio.run(agent.arun("ping"))
+    assert result["success"] == True
+    assert result["output"] == "Done: ping"
+
+    start = time.perf_counter()
+    results = asyncio.run(
+        agent.abatch([f"task {i}" for i in range(10)], max_concurrency=10)
+    )
+    elapsed = time.perf_counter() - start
+
+    assert [r["output"] for r in results] == [f"Done: task {i}" for i in range(10)]
+    # Ten 0.2s model calls overlap instead of taking 2s back to back
+    assert elapsed < 1.0
+
+    try:
+        asyncio.run(agent.abatch(["a", "b", "c"], session_ids=["x", "y"]))
+        assert False, "mismatched session_ids should raise"
+    except ValueError as e:
+        assert "2 session_ids for 3 tasks" in str(e)
+    print("✅ Async batch test passed")
+
+
+def test_lazy_compile():
+    """Test tools are batched into one lazy compile shared across agents."""
+    from langchain.tools import tool
+
+    @tool
+    def plugin_a(x: int) -> int:
+        """Double a number."""
+        return 2 * x
+
+    @tool
+    def plugin_b(x: int) -> int:
+        """Triple a number."""
+        return 3 * x
+
+    agent = _offline_agent()
+    prompt = agent.system_prompt
+    agent.add_tools(plugin_a)
+    agent.add_tool(plugin_b)
+    assert agent._agent is None
+    assert agent.system_prompt == prompt
+
+    assert agent.run("ping")["output"] == "Done: ping"
+    compiled = agent.agent
+    assert {"plugin_a", "plugin_b"} <= set(compiled.nodes["tools"].bound.tools_by_name)
+
+    other = _offline_agent()
+    other.llm = agent.llm
+    other.add_tools(plugin_a, plugin_b)
+    assert other.agent is compiled
+
+    other.add_tool(plugin_a.model_copy())
+    assert other.agent is not compiled
+    print("✅ Lazy compile test passed")
+
+
+def test_run_metrics():
+    """Test run results carry per-phase timings, token and tool-call counts."""
+    import tempfile
+    from pathlib import Path
+    from telemetry import JsonlMetricsSink
+
+    agent = _offline_agent()
+    agent.llm = ScriptedModel(script=_time_then_answer)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        agent.metrics_sinks = [JsonlMetricsSink(f"{tmpdir}/metrics.jsonl")]
+        result = agent.run("What time is it?")
+        logged = Path(f"{tmpdir}/metrics.jsonl").read_text().splitlines()
+
+    metrics = result["metrics"]
+    assert result["success"] and result["output"] == "It is late."
+    assert metrics["llm_calls"] == 2 and metrics["tool_calls"] == 1
+    assert metrics["tools"][0]["name"] == "get_current_time"
+    assert metrics["prompt_tokens"] == 20 and metrics["total_tokens"] == 30
+    assert 0 < metrics["llm_s"] + metrics["tools_s"] <= metrics["total_s"]
+    assert len(logged) == 1
+    print("✅ Run metrics test passed")
+
+
+def test_budgets():
+    """Test iteration, tool-timeout and wall-clock budgets stop runaway runs."""
+    from langchain.tools import tool
+
+    @tool
+    def slow_tool() -> str:
+        """Take a long time."""
+        time.sleep(2)
+        return "finally"
+
+    def loop_forever(messages):
+        call = {"name": "slow_tool", "args": {}, "id": f"call_{len(messages)}"}
+        content = f"working after {len(messages)} messages"
+        return AIMessage(content=content, tool_calls=[call])
+
+    class BudgetConfig(Config):
+        MAX_ITERATIONS = 3
+        MAX_EXECUTION_TIME = 30
+        TOOL_TIMEOUT = 30
+        TOOL_TIMEOUTS = "slow_tool=0.1"
+
+    agent = _offline_agent(config=BudgetConfig)
+    agent.llm = ScriptedModel(script=loop_forever)
+    agent.add_tool(slow_tool)
+    start = time.perf_counter()
+    result = agent.run("loop forever")
+    assert time.perf_counter() - start < 1.5
+    assert result["success"] is False and result["budget_exhausted"] == "iterations"
+    assert result["output"].startswith("working after")
+    assert result["metrics"]["llm_calls"] == 3
+
+    class DeadlineConfig(BudgetConfig):
+        MAX_EXECUTION_TIME = 0.3
+
+    agent = _offline_agent(config=DeadlineConfig)
+    agent.llm = ScriptedModel(script=loop_forever, delay=1.0)
+    agent.add_tool(slow_tool)
+
+    async def timed_arun(task):
+        # Timed inside the loop: asyncio.run waits for abandoned executor calls
+        start = time.perf_counter()
+        return await agent.arun(task), time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [(agent.run("too slow"), time.perf_counter() - start)]
+    results.append(asyncio.run(timed_arun("too slow")))
+    for result, elapsed in results:
+        assert elapsed < 0.8
+        assert result["partial"] and result["budget_exhausted"] == "time"
+
+    # A call that timed out waiting for a concurrency slot never runs
+    written = []
+
+    @tool
+    def slow_write(x: int) -> str:
+        """Write something slowly."""
+        time.sleep(0.3)
+        written.append(x)
+        return "written"
+
+    def write_twice(messages):
+        if messages[-1].type == "tool":
+            return AIMessage(content="done")
+        calls = [
+            {"name": "slow_write", "args": {"x": i}, "id": f"call_{i}"}
+            for i in range(2)
+        ]
+        return AIMessage(content="", tool_calls=calls)
+
+    class SlotConfig(BudgetConfig):
+        TOOL_TIMEOUTS = "slow_write=0.1"
+        TOOL_CONCURRENCY = "slow_write=1"
+
+    agent = _offline_agent(config=SlotConfig)
+    agent.llm = ScriptedModel(script=write_twice)
+    agent.add_tool(slow_write)
+    assert agent.run("write twice")["output"] == "done"
+    time.sleep(0.6)
+    assert len(written) == 1
+    print("✅ Budgets test passed")
+
+
+def test_stream():
+    """Test stream() yields tokens and tool events before the final result."""
+    import json
+    import re
+    from langchain_core.messages import AIMessageChunk
+    from langchain_core.outputs import ChatGenerationChunk
+
+    class StreamingModel(ScriptedModel):
+        """Streams the script's tool calls in one chunk and text word by word."""
+
+        def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+            reply = self.script(messages)
+            if reply.tool_calls:
+                calls = [
+                    {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"]}
+                    for c in reply.tool_calls
+                ]
+                chunk = AIMessageChunk(content="", tool_call_chunks=calls)
+                yield ChatGenerationChunk(message=chunk)
+                return
+            for word in re.findall(r"\S+\s*", reply.content):
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=word))
+                if run_manager:
+                    run_manager.on_llm_new_token(word, chunk=chunk)
+                yield chunk
+
+    agent = _offline_agent()
+    agent.llm = StreamingModel(script=_time_then_answer)
+    events = list(agent.stream("What time is it?"))
+    kinds = [event["type"] for event in events]
+    assert kinds == ["tool_call", "tool_result", "token", "token", "token", "result"]
+    assert events[0]["name"] == events[1]["name"] == "get_current_time"
+    assert "".join(e["content"] for e in events if e["type"] == "token") == (
+        "It is late."
+    )
+    result = events[-1]["result"]
+    assert result["success"] and result["output"] == "It is late."
+    assert result["metrics"]["tool_calls"] == 1
+
+    # Models without streaming support yield their answer as one token
+    echo = _offline_agent()
+    events = list(echo.stream("hello"))
+    assert [e["type"] for e in events] == ["token", "result"]
+    assert events[0]["content"] == events[1]["result"]["output"] == "Done: hello"
+    print("✅ Stream test passed")
+
+
+def test_parallel_tool_calls():
+    """Test one step's tool calls run concurrently, within per-tool limits."""
+    import threading
+    from langchain.tools import tool
+
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    @tool
+    def slow_lookup(x: int) -> str:
+        """Look something up slowly."""
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.2)
+        with lock:
+            running["now"] -= 1
+        return str(x)
+
+    def fan_out(messages):
+        """Asks for four lookups in one step, then answers."""
+        if messages[-1].type == "tool":
+            return AIMessage(content="done")
+        calls = [
+            {"name": "slow_lookup", "args": {"x": i}, "id": f"call_{i}"}
+            for i in range(4)
+        ]
+        return AIMessage(content="", tool_calls=calls)
+
+    def timed_run(config):
+        agent = _offline_agent(config=config)
+        agent.llm = ScriptedModel(script=fan_out)
+        agent.add_tool(slow_lookup)
+        running["peak"] = 0
+        start = time.perf_counter()
+        result = agent.run("look up four things")
+        assert result["success"] and result["metrics"]["tool_calls"] == 4
+        return time.perf_counter() - start, running["peak"]
+
+    class Unlimited(Config):
+        TOOL_CONCURRENCY = ""
+
+    class Limited(Config):
+        TOOL_CONCURRENCY = "slow_lookup=2"
+
+    elapsed, peak = timed_run(Unlimited)
+    assert peak == 4 and elapsed < 0.6
+    elapsed, peak = timed_run(Limited)
+    assert peak == 2 and 0.4 <= elapsed < 1.0
+
+    agent = _offline_agent(config=Limited)
+    agent.llm = ScriptedModel(script=fan_out)
+    agent.add_tool(slow_lookup)
+    running["peak"] = 0
+    assert asyncio.run(agent.arun("look up four things"))["success"]
+    assert running["peak"] == 2
+
+    # Slots are per process, not per middleware instance or compiled graph
+    from types import SimpleNamespace
+    from concurrency import ToolConcurrencyMiddleware
+
+    request = SimpleNamespace(tool_call={"name": "slow_lookup", "id": "call_0"})
+    running["peak"] = 0
+    threads = [
+        threading.Thread(
+            target=ToolConcurrencyMiddleware({"slow_lookup": 1}).wrap_tool_call,
+            args=(request, lambda request: slow_lookup.invoke({"x": 0})),
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert running["peak"] == 1
+    print("✅ Parallel tool calls test passed")
+
+
 if __name__ == "__main__":
     test_basic_task()
     test_file_task()
     test_custom_tool()
+    test_async_batch()
+    test_lazy_compile()
+    test_run_metrics()
+    test_budgets()
+    test_stream()
+    test_parallel_tool_calls()
     print("\n🎉 All agent tests passed!")
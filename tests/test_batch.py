@@ -0,0 +1,115 @@
+import sys
+
+sys.path.insert(0, "..")
+import asyncio
+import json
+import tempfile
+from pathlib import Path
+
+
+class FakeAgent:
+    """Stands in for TaskAutomationAgent; fails tasks containing 'fail'."""
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def arun(self, task, session_id=None):
+        self.calls.append((task, session_id))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if "fail" in task:
+            return {"success": False, "error": "boom"}
+        return {"success": True, "output": task.upper()}
+
+
+def test_batch_mode():
+    """Test batch mode runs tasks with bounded concurrency and writes results."""
+    from main import batch_mode
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tasks_file = Path(tmpdir) / "tasks.jsonl"
+        output_file = Path(tmpdir) / "results.jsonl"
+        lines = [json.dumps({"id": f"t{i}", "task": f"task {i}"}) for i in range(20)]
+        lines.append(json.dumps({"id": "s", "task": "hi", "session_id": "alice"}))
+        lines.append("plain text task")
+        lines.append(json.dumps({"id": "bad", "task": "please fail"}))
+        tasks_file.write_text("\n".join(lines) + "\n")
+
+        agent = FakeAgent()
+        stats = batch_mode(agent, str(tasks_file), str(output_file), concurrency=4)
+
+        assert stats["completed"] == 23
+        assert stats["succeeded"] == 22 and stats["failed"] == 1
+        assert 1 < agent.max_in_flight <= 4
+        assert ("hi", "alice") in agent.calls
+
+        records = {
+            r["id"]: r for r in map(json.loads, output_file.read_text().splitlines())
+        }
+        assert records["t3"]["output"] == "TASK 3"
+        assert records["22"]["output"] == "PLAIN TEXT TASK"
+        assert records["bad"]["error"] == "boom"
+        assert stats["p50_s"] <= stats["p99_s"]
+
+    print("✅ Batch mode test passed")
+
+
+def test_batch_resume():
+    """Test a partial output file is resumed, retrying only failed tasks."""
+    from main import batch_mode
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tasks_file = Path(tmpdir) / "tasks.jsonl"
+        output_file = Path(tmpdir) / "results.jsonl"
+        tasks_file.write_text(
+            "\n".join(json.dumps({"id": str(i), "task": f"t{i}"}) for i in range(5))
+        )
+        output_file.write_text(
+            json.dumps({"id": "0", "success": True})
+            + "\n"
+            + json.dumps({"id": "1", "success": False})
+            + "\n"
+            + '{"id": "2", "succ'
+        )
+
+        agent = FakeAgent()
+        stats = batch_mode(agent, str(tasks_file), str(output_file), concurrency=2)
+
+        assert stats["skipped"] == 1
+        assert sorted(task for task, _ in agent.calls) == ["t1", "t2", "t3", "t4"]
+
+        # New records start after the torn line instead of extending it
+        lines = output_file.read_text().splitlines()
+        assert lines[2] == '{"id": "2", "succ'
+        assert {json.loads(line)["id"] for line in lines[3:]} == {"1", "2", "3", "4"}
+
+    print("✅ Batch resume test passed")
+
+
+def test_batch_concurrency_validated():
+    """Test --concurrency below 1 is rejected instead of dropping every task."""
+    import subprocess
+
+    for value in ("0", "-3"):
+        proc = subprocess.run(
+            [sys.executable, "main.py", "--batch", "tasks.jsonl", "-c", value],
+            cwd=Path(__file__).resolve().parent.parent,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        assert proc.returncode == 2
+        assert "must be at least 1" in proc.stderr
+
+    print("✅ Batch concurrency validation test passed")
+
+
+if __name__ == "__main__":
+    test_batch_mode()
+    test_batch_resume()
+    test_batch_concurrency_validated()
+    print("\n🎉 All batch tests passed!")
@@ -61,8 +61,177 @@ def test_search_files():
     print("✅ Search files test passed")
 
 
+def test_read_file_ranges():
+    """Test read_file ranges and head/tail summary of large files."""
+    from tools import read_file
+    from tools.file_tools import READ_LIMIT
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "big.log"
+        path.write_text("".join(f"line {i}\n" for i in range(1, 50001)))
+
+        summary = read_file.invoke({"path": str(path)})
+        assert len(summary) < READ_LIMIT
+        assert "line 1\n" in summary and "line 50000\n" in summary
+        assert "line 25000\n" not in summary
+
+        lines = read_file.invoke({"path": str(path), "start_line": 10, "end_line": 12})
+        assert lines.endswith("line 10\nline 11\nline 12\n")
+
+        chunk = read_file.invoke({"path": str(path), "offset": 7, "length": 7})
+        assert chunk.endswith("\nline 2\n")
+        assert "offset=14" in chunk
+
+        # A single line bigger than the limit is cut, not returned whole
+        minified = Path(tmpdir) / "minified.json"
+        minified.write_text("x" * (5 * 1024 * 1024))
+        first = read_file.invoke({"path": str(minified), "start_line": 1})
+        assert len(first) < READ_LIMIT + 200
+        assert f"continue with offset={READ_LIMIT}" in first
+        rest = read_file.invoke(
+            {"path": str(minified), "offset": READ_LIMIT, "length": 10}
+        )
+        assert rest.endswith("\n" + "x" * 10)
+
+    print("✅ Read file ranges test passed")
+
+
+def test_search_files_index():
+    """Test recursive search, content grep, paging and index invalidation."""
+    from tools import list_directory, search_files, write_file
+    from tools.file_tools import DirectoryIndex
+    import os
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for i in range(5):
+            write_file.invoke(
+                {"path": f"{tmpdir}/pkg/mod{i}.py", "content": f"value = {i}\n"}
+            )
+        write_file.invoke({"path": f"{tmpdir}/top.py", "content": "TODO: fix\n"})
+
+        result = search_files.invoke({"directory": tmpdir, "pattern": "**/*.py"})
+        assert "Found 6 files" in result and "pkg/mod3.py" in result
+
+        page = search_files.invoke(
+            {"directory": tmpdir, "pattern": "*.py", "recursive": True, "limit": 2}
+        )
+        assert page.count("FILE ") == 2 and "offset=2" in page
+
+        grep = search_files.invoke(
+            {"directory": tmpdir, "pattern": "**/*.py", "content": r"value = [34]"}
+        )
+        assert "Found 2 files" in grep and "mod4.py" in grep and "1: value" in grep
+
+        listing = list_directory.invoke({"path": f"{tmpdir}/pkg", "limit": 3})
+        assert listing.startswith("FILE mod0.py") and "offset=3" in listing
+
+        # Listings are cached once a directory's mtime has settled
+        index = DirectoryIndex()
+        past = time.time() - 60
+        os.utime(f"{tmpdir}/pkg", (past, past))
+        assert len(index.entries(f"{tmpdir}/pkg")) == 5
+        assert len(index.entries(f"{tmpdir}/pkg")) == 5
+        assert index.hits == 1
+
+        write_file.invoke({"path": f"{tmpdir}/pkg/new.py", "content": ""})
+        assert len(index.entries(f"{tmpdir}/pkg")) == 6
+
+    print("✅ Search files index test passed")
+
+
+def test_search_files_glob_semantics():
+    """Test directory parts in patterns and sizes of files grown in place."""
+    from tools import search_files, write_file
+    from tools.file_tools import directory_index
+    import os
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        write_file.invoke({"path": f"{tmpdir}/src/a.py", "content": "a"})
+        write_file.invoke({"path": f"{tmpdir}/src/sub/b.py", "content": "b"})
+
+        # Like Path.glob, "*" never crosses a directory separator
+        result = search_files.invoke({"directory": tmpdir, "pattern": "src/*.py"})
+        assert "Found 1 files" in result and "src/a.py" in result
+        result = search_files.invoke(
+            {"directory": tmpdir, "pattern": "src/*.py", "recursive": True}
+        )
+        assert "Found 1 files" in result and "sub/b.py" not in result
+        result = search_files.invoke({"directory": tmpdir, "pattern": "src/**/*.py"})
+        assert "Found 2 files" in result and "src/sub/b.py" in result
+        result = search_files.invoke({"directory": tmpdir, "pattern": "*/sub/*.py"})
+        assert "Found 1 files" in result and "src/sub/b.py" in result
+
+        # Appending doesn't change the directory's mtime, sizes must be fresh
+        log = os.path.join(tmpdir, "grow.log")
+        write_file.invoke({"path": log, "content": "x"})
+        past = time.time() - 60
+        os.utime(tmpdir, (past, past))
+        assert "(1 bytes)" in search_files.invoke(
+            {"directory": tmpdir, "pattern": "*.log"}
+        )
+        with open(log, "a") as f:
+            f.write("x" * 1000)
+        result = search_files.invoke({"directory": tmpdir, "pattern": "*.log"})
+        assert "(1001 bytes)" in result
+        assert directory_index.hits > 0
+
+    print("✅ Search files glob semantics test passed")
+
+
+def test_batch_file_tools():
+    """Test batch write/copy/delete with globs and per-item failures."""
+    from tools import copy_files, delete_files, write_files
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = {f"{tmpdir}/src/sub/f{i}.txt": f"data {i}" for i in range(20)}
+        result = write_files.invoke({"files": files})
+        assert result.startswith("Wrote 20/20 files")
+
+        result = copy_files.invoke(
+            {
+                "sources": [f"{tmpdir}/src/**/*.txt", f"{tmpdir}/missing.txt"],
+                "destination": f"{tmpdir}/backup",
+            }
+        )
+        assert result.startswith("Copied 20/21 files (1 failed)")
+        assert "ERR " in result and "missing.txt" in result
+        assert (Path(tmpdir) / "backup/sub/f7.txt").read_text() == "data 7"
+
+        result = delete_files.invoke({"paths": [f"{tmpdir}/backup/sub/*.txt"]})
+        assert result.startswith("Deleted 20/20 files")
+        assert not list((Path(tmpdir) / "backup/sub").iterdir())
+
+        # Sources with the same name must not overwrite each other
+        write_files.invoke(
+            {"files": {f"{tmpdir}/a/x.txt": "a", f"{tmpdir}/b/x.txt": "b"}}
+        )
+        result = copy_files.invoke(
+            {
+                "sources": [f"{tmpdir}/a/x.txt", f"{tmpdir}/b/x.txt"],
+                "destination": f"{tmpdir}/dst",
+            }
+        )
+        assert result.startswith("Copied 1/2 files (1 failed)")
+        assert "ERR " in result and "already the target of" in result
+        assert (Path(tmpdir) / "dst/x.txt").read_text() == "a"
+
+    print("✅ Batch file tools test passed")
+
+
 if __name__ == "__main__":
     test_copy_file()
     test_delete_file()
     test_search_files()
+    test_read_file_ranges()
+    test_search_files_index()
+    test_search_files_glob_semantics()
+    test_batch_file_tools()
     print("\n🎉 All file tools tests passed!")
@@ -0,0 +1,91 @@
+import sys
+
+sys.path.insert(0, "..")
+
+
+def _counting_model(cache):
+    """Chat model that counts how often it is really called."""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class CountingModel(BaseChatModel):
+        calls: int = 0
+
+        @property
+        def _llm_type(self):
+            return "counting"
+
+        def bind_tools(self, tools, **kwargs):
+            return self.bind(tools=[tool.name for tool in tools], **kwargs)
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            self.calls += 1
+            reply = AIMessage(content=f"answer {self.calls}")
+            return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    return CountingModel(cache=cache)
+
+
+def test_llm_cache_hits():
+    """Test repeated prompts skip the model unless the tools differ."""
+    from langchain.tools import tool
+    from llm_cache import LLMResponseCache
+
+    @tool
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return query
+
+    model = _counting_model(LLMResponseCache(max_entries=8))
+    assert model.invoke("hello").content == "answer 1"
+    assert model.invoke("hello").content == "answer 1"
+    assert model.invoke("other").content == "answer 2"
+    assert model.calls == 2
+
+    with_tools = model.bind_tools([lookup])
+    assert with_tools.invoke("hello").content == "answer 3"
+    assert with_tools.invoke("hello").content == "answer 3"
+    assert model.calls == 3
+    assert model.cache.stats()["hits"] == 2
+
+    print("✅ LLM cache hit test passed")
+
+
+def test_llm_cache_sqlite_tier():
+    """Test responses persist in SQLite, expire, and are trimmed by size."""
+    import tempfile
+    import time
+    from llm_cache import LLMResponseCache
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = f"{tmpdir}/llm_cache.db"
+        first = _counting_model(LLMResponseCache(db_path=db_path))
+        first.invoke("hello")
+
+        # A fresh process-level cache is served from the file
+        second = _counting_model(LLMResponseCache(db_path=db_path))
+        assert second.invoke("hello").content == "answer 1"
+        assert second.calls == 0
+
+        expiring = _counting_model(LLMResponseCache(ttl=0.1, db_path=db_path))
+        expiring.invoke("short lived")
+        time.sleep(0.15)
+        expiring.cache._entries.clear()
+        expiring.invoke("short lived")
+        assert expiring.calls == 2
+
+        cache = LLMResponseCache(db_path=db_path, max_rows=10)
+        model = _counting_model(cache)
+        for i in range(100):
+            model.invoke(f"prompt {i}")
+        rows = cache._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        assert rows <= 10
+
+    print("✅ LLM cache SQLite test passed")
+
+
+if __name__ == "__main__":
+    test_llm_cache_hits()
+    test_llm_cache_sqlite_tier()
+    print("\n🎉 All LLM cache tests passed!")
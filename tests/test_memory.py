@@ -4,6 +4,21 @@ sys.path.insert(0, "..")
 import tempfile
 from pathlib import Path
 from datetime import datetime
+import numpy as np
+
+from tools.embeddings import HashingEmbeddings
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    """Hashing embeddings that count how many texts were embedded."""
+
+    def __init__(self):
+        super().__init__()
+        self.embedded = 0
+
+    def embed(self, texts):
+        self.embedded += len(texts)
+        return super().embed(texts)
 
 
 def test_rag_memory_creation():
@@ -77,6 +92,55 @@ def test_retrieve_context():
         print("✅ Retrieve context test passed")
 
 
+def test_build_context_budget():
+    """Test context is ranked, shortened and packed into the token budget."""
+    from tools.memory_manager import (
+        ConversationRAGMemory,
+        estimate_tokens,
+        shorten_to_tokens,
+    )
+
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("你好世界") == 4
+    shortened = shorten_to_tokens("start " + "x" * 4000 + " end", 50)
+    assert estimate_tokens(shortened) <= 50
+    assert shortened.startswith("start") and shortened.endswith("end")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        memory = ConversationRAGMemory(
+            memory_file=str(Path(tmpdir) / "ctx.json"), max_size=50
+        )
+        memory.add_messages(
+            [
+                {"role": "user", "content": "Python packaging with pip"},
+                {"role": "assistant", "content": "Python " + "wheel " * 500},
+            ]
+        )
+        memory.add_messages([{"role": "user", "content": "Python packaging again"}])
+
+        context, tokens = memory.build_context(
+            "Python packaging", max_tokens=120, max_entry_tokens=60
+        )
+        assert context.startswith("Relevant conversation:")
+        assert 0 < tokens <= 120
+        assert estimate_tokens(context) <= tokens
+        assert "…" in context
+        # Listed oldest first
+        assert context.index("pip") < context.index("again")
+
+        # A budget too small for any entry yields no context
+        assert memory.build_context("Python", max_tokens=5) == ("", 0)
+
+        # With full recency weight the newest message ranks first
+        context, _ = memory.build_context(
+            "Python packaging", max_tokens=30, max_entry_tokens=30, recency_weight=1.0
+        )
+        assert "again" in context and "pip" not in context
+
+    print("✅ Build context budget test passed")
+
+
 def test_size_limit():
     """Test memory enforces size limit."""
     from tools.memory_manager import ConversationRAGMemory
@@ -117,10 +181,269 @@ def test_persistence():
         print("✅ Persistence test passed")
 
 
+def test_journal_persistence():
+    """Test turns are appended to the journal and compacted periodically."""
+    from tools.memory_manager import ConversationRAGMemory
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        mem_file = Path(tmpdir) / "test_rag.json"
+        journal_file = Path(f"{mem_file}.journal")
+        memory = ConversationRAGMemory(
+            memory_file=str(mem_file), max_size=5, compact_every=4
+        )
+
+        memory.add_messages([{"role": "user", "content": "First"}])
+        memory.add_messages([{"role": "assistant", "content": "Second"}])
+
+        # Only the journal is written between compactions
+        assert not mem_file.exists()
+        assert len(journal_file.read_text().splitlines()) == 2
+
+        # A torn trailing line from a crash is ignored on replay
+        with open(journal_file, "a") as f:
+            f.write('{"role": "user", "cont')
+        replayed = ConversationRAGMemory(memory_file=str(mem_file), max_size=5)
+        assert [m["content"] for m in replayed.messages] == ["First", "Second"]
+        assert not journal_file.exists()
+
+        memory.add_messages(
+            [
+                {"role": "user", "content": "Third"},
+                {"role": "assistant", "content": "Fourth"},
+            ]
+        )
+
+        # Reaching compact_every rewrites the snapshot and resets the journal
+        assert mem_file.exists()
+        assert not journal_file.exists()
+
+        memory.add_messages([{"role": "user", "content": "Fifth"}])
+        memory.add_messages([{"role": "user", "content": "Sixth"}])
+
+        reloaded = ConversationRAGMemory(memory_file=str(mem_file), max_size=5)
+        assert [m["content"] for m in reloaded.messages] == [
+            "Second",
+            "Third",
+            "Fourth",
+            "Fifth",
+            "Sixth",
+        ]
+
+        print("✅ Journal persistence test passed")
+
+
+def test_persisted_vectors():
+    """Test vectors are saved to disk and reused instead of re-embedding."""
+    from tools.memory_manager import ConversationRAGMemory
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        mem_file = Path(tmpdir) / "test_rag.json"
+        memory1 = ConversationRAGMemory(
+            memory_file=str(mem_file), max_size=10, compact_every=4
+        )
+        memory1.add_messages(
+            [
+                {"role": "user", "content": "My favourite database is PostgreSQL"},
+                {"role": "assistant", "content": "Noted, you like PostgreSQL"},
+                {"role": "user", "content": "The deploy target is Kubernetes"},
+                {"role": "assistant", "content": "Kubernetes deploys it is"},
+            ]
+        )
+        memory1.add_messages([{"role": "user", "content": "Lunch is at noon"}])
+
+        # Snapshot vectors plus one journalled vector row
+        assert np.load(f"{mem_file}.npy").shape == (4, 384)
+        assert Path(f"{mem_file}.journal.f32").stat().st_size == 384 * 4
+
+        embeddings = CountingEmbeddings()
+        memory2 = ConversationRAGMemory(
+            memory_file=str(mem_file), max_size=10, embeddings=embeddings
+        )
+        assert embeddings.embedded == 0
+        assert np.allclose(memory2.vectorstore.vectors, memory1.vectorstore.vectors)
+
+        # Retrieval is lexical, not random
+        docs = memory2.vectorstore.similarity_search("which database?", k=1)
+        assert "PostgreSQL" in docs[0].page_content
+        docs = memory2.vectorstore.similarity_search("kubernetes deployment", k=2)
+        assert all("Kubernetes" in doc.page_content for doc in docs)
+
+        print("✅ Persisted vectors test passed")
+
+
+def test_orphan_journal_vectors():
+    """Test vector rows left by a crash never shift later journal vectors."""
+    from tools.memory_manager import ConversationRAGMemory
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        mem_file = str(Path(tmpdir) / "test_rag.json")
+        memory = ConversationRAGMemory(memory_file=mem_file, compact_every=100)
+        memory.add_messages([{"role": "user", "content": "Lunch is at noon"}])
+
+        # Crash after the vector row was appended, before its JSON line
+        orphan = memory.vectorstore.embed_texts(["quantum physics electrons"])
+        with open(f"{mem_file}.journal.f32", "ab") as f:
+            f.write(orphan.tobytes())
+
+        memory = ConversationRAGMemory(memory_file=mem_file, compact_every=100)
+        memory.add_messages([{"role": "user", "content": "car engine repair garage"}])
+
+        memory = ConversationRAGMemory(memory_file=mem_file, compact_every=100)
+        hits = memory.vectorstore.similarity_search_with_score(
+            "quantum physics electrons", k=2
+        )
+        assert all(score < 0.5 for _, score in hits)
+        ((doc, score),) = memory.vectorstore.similarity_search_with_score(
+            "car engine repair garage", k=1
+        )
+        assert doc.page_content == "car engine repair garage" and score > 0.99
+
+    print("✅ Orphan journal vectors test passed")
+
+
+def test_eviction_keeps_survivors():
+    """Test size limit evicts the oldest messages without re-embedding."""
+    from tools.memory_manager import ConversationRAGMemory
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        mem_file = Path(tmpdir) / "test_rag.json"
+        embeddings = CountingEmbeddings()
+        memory = ConversationRAGMemory(
+            memory_file=str(mem_file), max_size=3, embeddings=embeddings
+        )
+
+        for i in range(10):
+            memory.add_messages([{"role": "user", "content": f"Message {i}"}])
+
+        # Every message embedded exactly once, survivors are the newest three
+        assert embeddings.embedded == 10
+        assert [m["content"] for m in memory.messages] == [
+            "Message 7",
+            "Message 8",
+            "Message 9",
+        ]
+        assert memory.vectorstore.ids == [m["id"] for m in memory.messages]
+
+        # Freed slots are reused instead of growing the matrix
+        assert len(memory.vectorstore._vectors) == 5
+
+        print("✅ Eviction test passed")
+
+
+def test_ivf_index():
+    """Test IVF search recall, incremental insert/delete and persistence."""
+    from tools.memory_manager import ConversationRAGMemory, IVFIndex, NumpyVectorStore
+    from tools.embeddings import HashingEmbeddings
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((20, 64)).astype(np.float32)
+    data = centers[rng.integers(0, 20, 2000)] + 0.5 * rng.standard_normal(
+        (2000, 64)
+    ).astype(np.float32)
+    texts = [str(i) for i in range(2000)]
+
+    exact = NumpyVectorStore(embedding=HashingEmbeddings())
+    exact.add_vectors(data, texts, ids=texts)
+    ivf = NumpyVectorStore(
+        embedding=HashingEmbeddings(), index=IVFIndex(nprobe=4, min_train_size=500)
+    )
+    ivf.add_vectors(data[:1000], texts[:1000], ids=texts[:1000])
+    assert ivf.index.is_trained
+    ivf.add_vectors(data[1000:], texts[1000:], ids=texts[1000:])
+    assert len(ivf.index) == 2000
+
+    hits = 0
+    for query in data[:50]:
+        truth = {
+            d.id for d, _ in exact.similarity_search_by_vector_with_score(query, 5)
+        }
+        found = {d.id for d, _ in ivf.similarity_search_by_vector_with_score(query, 5)}
+        hits += len(truth & found)
+    assert hits / 250 >= 0.9
+
+    ivf.delete(ids=["0", "1"])
+    assert len(ivf.index) == 1998
+    found = [d.id for d in ivf.similarity_search_by_vector(data[0], 3)]
+    assert "0" not in found
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        mem_file = Path(tmpdir) / "test_rag.json"
+        memory = ConversationRAGMemory(
+            memory_file=str(mem_file),
+            max_size=2000,
+            compact_every=5000,
+            index_type="ivf",
+        )
+        memory.add_messages(
+            [
+                {"role": "user", "content": f"note {i} about topic {i % 37}"}
+                for i in range(1100)
+            ]
+        )
+        assert memory.vectorstore.index.is_trained
+        memory.compact()
+        assert Path(f"{mem_file}.ivf.npz").exists()
+
+        reloaded = ConversationRAGMemory(
+            memory_file=str(mem_file), max_size=2000, index_type="ivf"
+        )
+        assert len(reloaded.vectorstore.index) == 1100
+        assert np.array_equal(
+            reloaded.vectorstore.index_lists(), memory.vectorstore.index_lists()
+        )
+        assert "topic 5" in reloaded.retrieve_relevant_context("topic 5", k=1)
+
+    print("✅ IVF index test passed")
+
+
+def test_session_memory_pool():
+    """Test per-session shards are loaded lazily and LRU-evicted to disk."""
+    from tools.memory_manager import SessionMemoryPool
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        pool = SessionMemoryPool(
+            memory_dir=tmpdir,
+            max_shards=2,
+            default_file=str(Path(tmpdir) / "default.json"),
+            max_size=10,
+        )
+        assert len(pool) == 0
+
+        pool.get("alice").add_messages([{"role": "user", "content": "I am Alice"}])
+        pool.get("bob").add_messages([{"role": "user", "content": "I am Bob"}])
+        assert pool.get("alice").messages[0]["content"] == "I am Alice"
+        assert pool.get("bob").messages[0]["content"] == "I am Bob"
+
+        # Loading a third shard evicts the least recently used one (alice)
+        with pool.session("carol") as carol:
+            carol.add_messages([{"role": "user", "content": "I am Carol"}])
+            assert pool.loaded_sessions == ["bob", "carol"]
+
+            # Pinned shards survive even when over the cap
+            pool.get(None)
+            assert "carol" in pool.loaded_sessions
+            assert len(pool) == 2
+
+        # Evicted shards were compacted to their own file and reload lazily
+        assert Path(pool.shard_file("alice")).exists()
+        assert [m["content"] for m in pool.get("alice").messages] == ["I am Alice"]
+        assert pool.shard_file("../etc") != pool.shard_file("__etc")
+        assert Path(pool.shard_file("../etc")).parent == Path(tmpdir)
+
+        print("✅ Session memory pool test passed")
+
+
 if __name__ == "__main__":
     test_rag_memory_creation()
     test_add_messages()
     test_retrieve_context()
+    test_build_context_budget()
     test_size_limit()
     test_persistence()
+    test_journal_persistence()
+    test_persisted_vectors()
+    test_orphan_journal_vectors()
+    test_eviction_keeps_survivors()
+    test_ivf_index()
+    test_session_memory_pool()
     print("\n🎉 All RAG memory tests passed!")
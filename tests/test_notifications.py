@@ -0,0 +1,145 @@
+import sys
+
+sys.path.insert(0, "..")
+
+
+def _webhook_server(fail_first: int):
+    """Local HTTP stand-in for a webhook that fails its first requests."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import json
+    import threading
+
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            if len(received) < fail_first:
+                received.append(None)
+                self.send_response(500)
+            else:
+                received.append(json.loads(body)["notifications"])
+                self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+
+def test_dispatcher_batches_and_retries():
+    """Test notifications are batched, retried, and delivered to every sink."""
+    from tools.notifications import FileSink, NotificationDispatcher, WebhookSink
+    import json
+    import tempfile
+    from pathlib import Path
+
+    server, received = _webhook_server(fail_first=1)
+    try:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "notifications.jsonl"
+            dispatcher = NotificationDispatcher(
+                [
+                    WebhookSink(f"http://127.0.0.1:{server.server_port}/hook"),
+                    FileSink(str(path)),
+                ],
+                batch_size=10,
+                batch_interval=0.2,
+                backoff=0.01,
+            )
+            for i in range(10):
+                assert dispatcher.notify(f"message {i}")
+            assert dispatcher.flush(timeout=5)
+            dispatcher.close()
+
+            delivered = [n["message"] for batch in received if batch for n in batch]
+            assert delivered == [f"message {i}" for i in range(10)]
+            # One failed attempt, then the whole batch in a single retry
+            assert len(received) == 2
+            lines = path.read_text().splitlines()
+            assert [json.loads(line)["message"] for line in lines] == delivered
+            # Each notification counts once, however many sinks took it
+            assert dispatcher.stats()["sent"] == 10
+            assert dispatcher.stats()["failed"] == 0
+    finally:
+        server.shutdown()
+
+    print("✅ Notification dispatcher test passed")
+
+
+def test_dispatcher_counts_each_notification_once():
+    """Test a notification one sink delivered counts as sent, not failed."""
+    from tools.notifications import NotificationDispatcher, NotificationSink
+
+    class BrokenSink(NotificationSink):
+        def send(self, batch):
+            raise ConnectionError("down")
+
+    class ListSink(NotificationSink):
+        def __init__(self):
+            self.messages = []
+
+        def send(self, batch):
+            self.messages.extend(n["message"] for n in batch)
+
+    working = ListSink()
+    dispatcher = NotificationDispatcher(
+        [BrokenSink(), working], batch_interval=0.05, max_retries=0
+    )
+    for i in range(3):
+        dispatcher.notify(f"message {i}")
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+
+    assert len(working.messages) == 3
+    stats = dispatcher.stats()
+    assert stats["sent"] == 3 and stats["failed"] == 0
+
+    only_broken = NotificationDispatcher([BrokenSink()], max_retries=0)
+    only_broken.notify("lost")
+    assert only_broken.flush(timeout=5)
+    only_broken.close()
+    assert only_broken.stats()["failed"] == 1 and only_broken.stats()["sent"] == 0
+
+    print("✅ Notification counting test passed")
+
+
+def test_send_notification_is_queued():
+    """Test send_notification returns without waiting for a slow sink."""
+    import time
+    from tools import send_notification
+    from tools import notifications
+    from tools.notifications import NotificationDispatcher, NotificationSink
+
+    class SlowSink(NotificationSink):
+        def __init__(self):
+            self.messages = []
+
+        def send(self, batch):
+            time.sleep(0.5)
+            self.messages.extend(n["message"] for n in batch)
+
+    sink = SlowSink()
+    notifications.close_dispatcher()
+    notifications._dispatcher = NotificationDispatcher([sink], batch_interval=0)
+    try:
+        start = time.perf_counter()
+        result = send_notification.invoke({"message": "build finished"})
+        assert time.perf_counter() - start < 0.1
+        assert "queued" in result
+        assert notifications.get_dispatcher().flush(timeout=5)
+        assert sink.messages == ["build finished"]
+    finally:
+        notifications.close_dispatcher()
+
+    print("✅ Send notification test passed")
+
+
+if __name__ == "__main__":
+    test_dispatcher_batches_and_retries()
+    test_dispatcher_counts_each_notification_once()
+    test_send_notification_is_queued()
+    print("\n🎉 All notification tests passed!")
@@ -16,8 +16,194 @@ def test_search_imports():
         return False
 
 
+class CountingProvider:
+    """Fake SearchProvider that counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, query, num_results=3):
+        self.calls += 1
+        if query == "broken":
+            return "Error searching: offline"
+        return f"Search results for '{query}':\n{num_results} results"
+
+
+def test_search_cache():
+    """Test repeated searches are served from the in-memory cache."""
+    import time
+    from tools.search_tools import SearchCache, SearchManager
+
+    provider = CountingProvider()
+    cache = SearchCache(max_entries=2, ttl=0.2)
+    manager = SearchManager(provider=provider, cache=cache)
+
+    first = manager.search("LangChain  Agents", 3)
+    assert manager.search("langchain agents", 3) == first
+    assert provider.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    # num_results is part of the key
+    manager.search("langchain agents", 5)
+    assert provider.calls == 2
+
+    # Errors are not cached
+    manager.search("broken")
+    manager.search("broken")
+    assert provider.calls == 4
+
+    # LRU keeps max_entries, TTL expires the rest
+    assert cache.stats()["size"] == 2
+    time.sleep(0.25)
+    manager.search("langchain agents", 5)
+    assert provider.calls == 5
+
+    print("✅ Search cache test passed")
+
+
+def test_search_cache_persistence():
+    """Test the SQLite tier serves results across cache instances."""
+    import tempfile
+    from pathlib import Path
+    from tools.search_tools import SearchCache, SearchManager
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = str(Path(tmpdir) / "search_cache.db")
+        provider = CountingProvider()
+
+        SearchManager(provider, SearchCache(db_path=db_path)).search("python")
+        restarted = SearchCache(db_path=db_path)
+        result = SearchManager(provider, restarted).search("python")
+
+        assert provider.calls == 1
+        assert "python" in result
+        assert restarted.stats()["hits"] == 1
+
+        # Files from before rows tracked their last use are still readable
+        import sqlite3
+        import time
+
+        old_path = str(Path(tmpdir) / "old.db")
+        with sqlite3.connect(old_path) as db:
+            db.execute(
+                "CREATE TABLE search_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            db.execute(
+                "INSERT INTO search_cache VALUES (?, ?, ?)",
+                ("3:old query", "old result", time.time() + 60),
+            )
+        old = SearchCache(db_path=old_path)
+        assert old.get("3:old query") == "old result"
+        old.set("3:new query", "new result")
+
+    print("✅ Search cache persistence test passed")
+
+
+def test_composite_provider():
+    """Test fan-out search returns the fastest answer and merges duplicates."""
+    import time
+    from tools.search_providers import SearchProvider
+    from tools.search_providers.composite import CompositeProvider
+
+    class StubProvider(SearchProvider):
+        def __init__(self, delay, lines, fail=False):
+            self.delay, self.lines, self.fail, self.calls = delay, lines, fail, 0
+
+        def search(self, query, num_results=3):
+            self.calls += 1
+            time.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("backend down")
+            return f"Search results for '{query}':\n" + "\n".join(self.lines)
+
+    fast = StubProvider(0.01, ["- Fast: shared result", "- Fast only"])
+    slow = StubProvider(0.5, ["- fast:  SHARED result", "- Slow only"])
+    broken = StubProvider(0.0, [], fail=True)
+
+    first = CompositeProvider({"fast": fast, "slow": slow, "broken": broken})
+    start = time.perf_counter()
+    result = first.search("q")
+    assert time.perf_counter() - start < 0.3
+    assert "Fast only" in result and "Slow only" not in result
+
+    merged = CompositeProvider(
+        {"fast": fast, "slow": slow}, mode="merge", latency_budget=1.0
+    )
+    result = merged.search("q")
+    assert result.splitlines() == [
+        "Search results for 'q':",
+        "- Fast: shared result",
+        "- Fast only",
+        "- Slow only",
+    ]
+
+    # Answers past the latency budget are dropped
+    merged.latency_budget = 0.2
+    assert "Slow only" not in merged.search("q")
+
+    # A failing backend is skipped after failure_threshold errors
+    first.failure_threshold = 2
+    first.search("q")
+    calls = broken.calls
+    first.search("q")
+    assert broken.calls == calls
+    assert "broken" not in first.healthy_providers()
+
+    print("✅ Composite provider test passed")
+
+
+def test_provider_registry():
+    """Test providers are built lazily once and search_web uses the configured one."""
+    from config import Config
+    from tools import search_web
+    from tools.search_providers import (
+        clear_provider_cache,
+        get_provider,
+        register_provider,
+    )
+    from tools.search_tools import configure_search
+
+    built = []
+
+    def factory():
+        built.append(CountingProvider())
+        return built[-1]
+
+    class FakeConfig(Config):
+        SEARCH_PROVIDER = "counting"
+        SEARCH_CACHE_ENABLED = False
+
+    register_provider("counting", factory)
+    try:
+        assert built == []
+        assert get_provider("counting") is get_provider("counting")
+        assert len(built) == 1
+
+        configure_search(FakeConfig)
+        search_web.invoke({"query": "python"})
+        search_web.invoke({"query": "python"})
+        assert len(built) == 1
+        assert built[0].calls == 2
+
+        try:
+            get_provider("missing")
+            assert False, "unknown provider should raise"
+        except ValueError:
+            pass
+    finally:
+        configure_search(Config)
+        clear_provider_cache()
+
+    print("✅ Provider registry test passed")
+
+
 if __name__ == "__main__":
     if test_search_imports():
+        test_search_cache()
+        test_search_cache_persistence()
+        test_composite_provider()
+        test_provider_registry()
         print("\n🎉 Search tests passed!")
     else:
         print("\n❌ Search tests failed")
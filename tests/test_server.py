@@ -0,0 +1,206 @@
+import sys
+
+sys.path.insert(0, "..")
+
+from config import Config
+
+
+class ServerConfig(Config):
+    ENABLE_MEMORY = False
+    LLM_CACHE_ENABLED = False
+    METRICS_SINKS = ""
+
+
+def _stub_llm(delay: float = 0.0):
+    """Local stand-in for the ZhipuAI chat completions endpoint."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import json
+    import threading
+    import time
+
+    connections = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            connections.add(self.client_address)
+            self.server.calls += 1
+            time.sleep(delay)
+            body = json.dumps(
+                {
+                    "choices": [
+                        {
+                            "message": {"role": "assistant", "content": "stub answer"},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 7, "completion_tokens": 2},
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.calls = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, connections
+
+
+def _serve(stub, check, **kwargs):
+    """Run ``check(server, client)`` against an AgentServer using ``stub``."""
+    import asyncio
+    import os
+    import httpx
+    from server import AgentServer
+
+    env = {
+        "ZHIPUAI_API_KEY": "offline." + "0" * 32,
+        "ZHIPUAI_API_BASE": f"http://127.0.0.1:{stub.server_port}/chat",
+    }
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+
+    async def main():
+        server = AgentServer(ServerConfig, port=0, **kwargs)
+        await server.start()
+        try:
+            base_url = f"http://127.0.0.1:{server.port}"
+            async with httpx.AsyncClient(base_url=base_url, timeout=10) as client:
+                await check(server, client)
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(main())
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def test_server_runs_tasks():
+    """Test tasks, health and metrics, with model connections kept alive."""
+    stub, connections = _stub_llm()
+
+    async def check(server, client):
+        for i in range(3):
+            response = await client.post("/run", json={"task": f"task {i}"})
+            assert response.status_code == 200
+            result = response.json()
+            assert result["success"] and result["output"] == "stub answer"
+            assert result["metrics"]["prompt_tokens"] == 7
+
+        assert (await client.post("/run", json={"text": "no task"})).status_code == 400
+        assert (await client.get("/run")).status_code == 405
+        assert (await client.get("/nowhere")).status_code == 404
+
+        health = (await client.get("/health")).json()
+        assert health["status"] == "ok" and health["agents"] == 2
+        metrics = (await client.get("/metrics")).text
+        assert 'agent_server_requests_total{status="200"} 4' in metrics
+        assert 'agent_runs_total{status="success"} 3' in metrics
+
+    try:
+        _serve(stub, check, workers=2)
+    finally:
+        stub.shutdown()
+    # Every model call went over one pooled connection
+    assert len(connections) == 1
+    print("✅ Server test passed")
+
+
+def test_server_backpressure():
+    """Test a full queue is answered with 503 instead of waiting."""
+    import asyncio
+
+    stub, _ = _stub_llm(delay=0.5)
+
+    async def check(server, client):
+        first = asyncio.create_task(client.post("/run", json={"task": "first"}))
+        while server.in_flight == 0:
+            await asyncio.sleep(0.01)
+        # One agent busy, one slot in the queue: the third request is rejected
+        queued = asyncio.create_task(client.post("/run", json={"task": "queued"}))
+        while server.queue.qsize() == 0:
+            await asyncio.sleep(0.01)
+        rejected = await client.post("/run", json={"task": "rejected"})
+        assert rejected.status_code == 503
+        assert rejected.headers["Retry-After"] == "1"
+        assert (await first).status_code == 200
+        assert (await queued).status_code == 200
+        assert server.rejected == 1
+
+    try:
+        _serve(stub, check, workers=1, max_queue=1)
+    finally:
+        stub.shutdown()
+    print("✅ Server backpressure test passed")
+
+
+def test_server_drops_abandoned_requests():
+    """Test a queued request whose client hung up never reaches an agent."""
+    import asyncio
+    import json
+
+    stub, _ = _stub_llm(delay=0.5)
+
+    async def check(server, client):
+        first = asyncio.create_task(client.post("/run", json={"task": "first"}))
+        while server.in_flight == 0:
+            await asyncio.sleep(0.01)
+
+        body = json.dumps({"task": "abandoned"}).encode()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(
+            b"POST /run HTTP/1.1\r\nHost: test\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        while server.queue.qsize() == 0:
+            await asyncio.sleep(0.01)
+        writer.close()
+        while server.abandoned == 0:
+            await asyncio.sleep(0.01)
+
+        assert (await first).status_code == 200
+        while server.queue.qsize() or server.in_flight:
+            await asyncio.sleep(0.01)
+        assert stub.calls == 1
+
+    try:
+        _serve(stub, check, workers=1)
+    finally:
+        stub.shutdown()
+    print("✅ Server abandoned request test passed")
+
+
+def test_server_rejects_empty_pool():
+    """Test a pool without agents or queue slots is refused up front."""
+    from server import AgentServer
+
+    for kwargs in ({"workers": 0}, {"max_queue": 0}, {"workers": -1}):
+        try:
+            AgentServer(ServerConfig, **kwargs)
+            assert False, f"{kwargs} should raise"
+        except ValueError as e:
+            assert "must be at least 1" in str(e)
+    print("✅ Server settings validation test passed")
+
+
+if __name__ == "__main__":
+    test_server_runs_tasks()
+    test_server_backpressure()
+    test_server_drops_abandoned_requests()
+    test_server_rejects_empty_pool()
+    print("\n🎉 All server tests passed!")
@@ -0,0 +1,72 @@
+import sys
+
+sys.path.insert(0, "..")
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Import time allowed for `main.py --help`; eagerly loading LangChain costs >1s
+STARTUP_BUDGET_S = 0.5
+HEAVY_PREFIXES = ("langchain", "langgraph", "langsmith", "duckduckgo_search", "ddgs")
+
+
+def _import_times(*args):
+    """Run python -X importtime and return {module: self time in seconds}."""
+    import subprocess
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(self_us) / 1e6
+    return times
+
+
+def test_help_startup_budget():
+    """Test `main.py --help` stays within the startup budget."""
+    times = _import_times("main.py", "--help")
+    heavy = [name for name in times if name.startswith(HEAVY_PREFIXES)]
+    assert not heavy, f"--help imported {heavy[:5]}"
+
+    total = sum(times.values())
+    assert total < STARTUP_BUDGET_S, f"imports took {total:.3f}s"
+    print(f"✅ Startup test passed ({total * 1000:.0f} ms of imports)")
+
+
+def test_lazy_tool_imports():
+    """Test importing agent and tools defers LangChain until a tool is used."""
+    times = _import_times("-c", "import agent, tools, tools.notifications")
+    assert not [name for name in times if name.startswith(HEAVY_PREFIXES)]
+
+    import subprocess
+
+    loaded = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from tools import read_file; "
+            "print('tools.file_tools' in sys.modules, 'tools.search_tools' in sys.modules)",
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    ).stdout.split()
+    assert loaded == ["True", "False"]
+    print("✅ Lazy tool imports test passed")
+
+
+if __name__ == "__main__":
+    test_help_startup_budget()
+    test_lazy_tool_imports()
+    print("\n🎉 All startup tests passed!")
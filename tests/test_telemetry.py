@@ -0,0 +1,54 @@
+import sys
+
+sys.path.insert(0, "..")
+
+
+def _metrics(success=True, tool="read_file"):
+    return {
+        "success": success,
+        "total_s": 1.5,
+        "memory_retrieval_s": 0.1,
+        "llm_s": 1.0,
+        "tools_s": 0.25,
+        "memory_save_s": 0.05,
+        "overhead_s": 0.1,
+        "llm_calls": 2,
+        "tool_calls": 1,
+        "prompt_tokens": 100,
+        "completion_tokens": 20,
+        "total_tokens": 120,
+        "tools": [{"name": tool, "duration_s": 0.25, "error": False}],
+    }
+
+
+def test_prometheus_sink():
+    """Test the Prometheus textfile sink accumulates totals across runs."""
+    import tempfile
+    from pathlib import Path
+    from telemetry import PrometheusTextfileSink, emit
+
+    class BrokenSink:
+        def emit(self, metrics):
+            raise OSError("disk full")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "agent.prom"
+        sink = PrometheusTextfileSink(str(path))
+        emit([BrokenSink(), sink], _metrics())
+        emit([sink], _metrics(success=False, tool="search_web"))
+
+        lines = set(path.read_text().splitlines())
+        assert 'agent_runs_total{status="success"} 1' in lines
+        assert 'agent_runs_total{status="error"} 1' in lines
+        assert "agent_run_seconds_total 3.000000" in lines
+        assert 'agent_phase_seconds_total{phase="llm"} 2.000000' in lines
+        assert 'agent_tokens_total{type="prompt"} 200' in lines
+        assert 'agent_tool_calls_total{tool="search_web"} 1' in lines
+        assert not Path(f"{path}.tmp").exists()
+
+    print("✅ Prometheus sink test passed")
+
+
+if __name__ == "__main__":
+    test_prometheus_sink()
+    print("\n🎉 All telemetry tests passed!")
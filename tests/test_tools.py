@@ -46,11 +46,45 @@ def test_agent_creation():
         return False
 
 
+def test_append_to_log():
+    """Test append_to_log appends, buffers, and rotates across threads."""
+    from tools import append_to_log
+    from tools.custom_tools import BufferedLogWriter, close_log_writers
+    from concurrent.futures import ThreadPoolExecutor
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = f"{tmpdir}/logs/agent.log"
+        append_to_log.invoke({"message": "first", "log_file": log_file})
+        append_to_log.invoke({"message": "second", "log_file": log_file})
+        close_log_writers()
+        lines = Path(log_file).read_text().splitlines()
+        assert len(lines) == 2
+        assert lines[0].endswith("first") and lines[1].endswith("second")
+
+        writer = BufferedLogWriter(
+            f"{tmpdir}/rotating.log", flush_bytes=100, max_bytes=1000, backup_count=2
+        )
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda i: writer.write(f"entry {i:04d}\n"), range(400)))
+        writer.close()
+
+        rotated = [Path(f"{tmpdir}/rotating.log{s}") for s in ("", ".1", ".2")]
+        assert all(0 < path.stat().st_size <= 1000 for path in rotated)
+        assert not Path(f"{tmpdir}/rotating.log.3").exists()
+        entries = [line for p in rotated for line in p.read_text().splitlines()]
+        assert len(set(entries)) == len(entries)
+
+    print("✅ Append to log test passed")
+
+
 if __name__ == "__main__":
     all_passed = True
     all_passed &= test_imports()
     all_passed &= test_config()
     all_passed &= test_agent_creation()
+    test_append_to_log()
 
     if all_passed:
         print("\n🎉 All tests passed!")
@@ -1,23 +1,38 @@
-from tools.file_tools import (
-    read_file,
-    write_file,
-    list_directory,
-    copy_file,
-    delete_file,
-    search_files,
-)
-from tools.custom_tools import get_current_time, send_notification, append_to_log
-from tools.search_tools import search_web
-
-__all__ = [
-    "read_file",
-    "write_file",
-    "list_directory",
-    "copy_file",
-    "delete_file",
-    "search_files",
-    "get_current_time",
-    "send_notification",
-    "append_to_log",
-    "search_web",
-]
+"""Agent tools.
+
+Tools are imported on first access (PEP 562), so ``import tools`` and the
+lightweight submodules don't pull in LangChain until a tool is needed.
+"""
+
+import importlib
+
+_TOOL_MODULES = {
+    "read_file": "tools.file_tools",
+    "write_file": "tools.file_tools",
+    "list_directory": "tools.file_tools",
+    "copy_file": "tools.file_tools",
+    "delete_file": "tools.file_tools",
+    "search_files": "tools.file_tools",
+    "copy_files": "tools.file_tools",
+    "delete_files": "tools.file_tools",
+    "write_files": "tools.file_tools",
+    "get_current_time": "tools.custom_tools",
+    "send_notification": "tools.custom_tools",
+    "append_to_log": "tools.custom_tools",
+    "search_web": "tools.search_tools",
+}
+
+__all__ = list(_TOOL_MODULES)
+
+
+def __getattr__(name):
+    module = _TOOL_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
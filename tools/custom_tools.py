@@ -1,6 +1,159 @@
 from datetime import datetime
+from typing import Dict, List, Optional
+import atexit
+import os
+import threading
+import time
 from langchain.tools import tool
 
+# Buffered log entries are written once this many bytes are pending...
+LOG_FLUSH_BYTES = 64 * 1024
+# ...or once the oldest pending entry is this many seconds old
+LOG_FLUSH_INTERVAL = 1.0
+# Logs are rotated to <log>.1 ... <log>.N past this size (0 disables)
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+
+class BufferedLogWriter:
+    """Thread-safe append-only log file with buffered writes and rotation.
+
+    The file is opened once in append mode and kept open. Entries are held
+    in memory until ``flush_bytes`` are pending or ``flush_interval``
+    seconds have passed, then written in one call. When a write would push
+    the file past ``max_bytes`` it is rotated first, keeping
+    ``backup_count`` old files.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        flush_bytes: int = LOG_FLUSH_BYTES,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+    ):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._buffer: List[bytes] = []
+        self._pending = 0
+        self._oldest = 0.0
+        self._file = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def write(self, entry: str):
+        data = entry.encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                # Open now so a bad path is reported by this call
+                self._open()
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(data)
+            self._pending += len(data)
+            if (
+                self._pending >= self.flush_bytes
+                or time.monotonic() - self._oldest >= self.flush_interval
+            ):
+                self._flush()
+
+    def flush(self, min_age: float = 0.0):
+        """Write pending entries, if the oldest is at least ``min_age`` old."""
+        with self._lock:
+            if self._buffer and time.monotonic() - self._oldest >= min_age:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        self._buffer.clear()
+        self._pending = 0
+        if self._file is None:
+            self._open()
+        if self.max_bytes and self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+        # Unbuffered handle, so this is a single write syscall
+        self._file.write(data)
+        self._size += len(data)
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "ab", buffering=0)
+        self._size = os.fstat(self._file.fileno()).st_size
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                older = f"{self.path}.{i}"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+            self._file = open(self.path, "ab", buffering=0)
+        else:
+            self._file = open(self.path, "wb", buffering=0)
+        self._size = 0
+
+
+_log_writers: Dict[str, BufferedLogWriter] = {}
+_log_writers_lock = threading.Lock()
+_log_flusher: Optional[threading.Thread] = None
+
+
+def get_log_writer(log_file: str) -> BufferedLogWriter:
+    """Return the shared writer for ``log_file``, creating it on first use."""
+    global _log_flusher
+    path = os.path.abspath(log_file)
+    writer = _log_writers.get(path)
+    if writer is not None:
+        return writer
+    with _log_writers_lock:
+        writer = _log_writers.get(path)
+        if writer is None:
+            writer = _log_writers[path] = BufferedLogWriter(path)
+        if _log_flusher is None:
+            _log_flusher = threading.Thread(
+                target=_flush_periodically, name="log-flusher", daemon=True
+            )
+            _log_flusher.start()
+        return writer
+
+
+def _flush_periodically():
+    # Writes only check the interval when they happen, so idle logs are
+    # flushed here
+    while True:
+        time.sleep(LOG_FLUSH_INTERVAL)
+        for writer in list(_log_writers.values()):
+            try:
+                writer.flush(min_age=LOG_FLUSH_INTERVAL)
+            except Exception:
+                pass
+
+
+@atexit.register
+def close_log_writers():
+    """Flush and close every open log file."""
+    with _log_writers_lock:
+        writers = list(_log_writers.values())
+        _log_writers.clear()
+    for writer in writers:
+        writer.close()
+
 
 @tool
 def get_current_time() -> str:
@@ -22,10 +175,14 @@ def send_notification(message: str) -> str:
     Returns:
         Confirmation message.
 
-    Note: Currently prints to console. Can be extended to Slack/Email.
+    Note: Delivered in the background to the sinks in NOTIFY_SINKS
+    (stdout, file, webhook).
     """
-    print(f"[NOTIFICATION] {message}")
-    return f"Notification sent: {message}"
+    from tools.notifications import get_dispatcher
+
+    if not get_dispatcher().notify(message):
+        return "Error sending notification: queue is full"
+    return f"Notification queued: {message}"
 
 
 @tool
@@ -40,12 +197,8 @@ def append_to_log(message: str, log_file: str = "agent.log") -> str:
         Confirmation message.
     """
     try:
-        from pathlib import Path
-
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_entry = f"[{timestamp}] {message}\n"
-        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
-        Path(log_file).write_text(log_entry, encoding="utf-8")
+        get_log_writer(log_file).write(f"[{timestamp}] {message}\n")
         return f"Logged to {log_file}"
     except Exception as e:
         return f"Error logging message: {str(e)}"
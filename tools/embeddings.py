@@ -0,0 +1,70 @@
+import math
+import re
+import zlib
+from collections import Counter
+from typing import FrozenSet, List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Function words that would otherwise dominate short conversational messages
+STOP_WORDS = frozenset(
+    "a about also an and are as at be but by can do does for from how i in is "
+    "it me my of on or so tell that the this to was we what when where which "
+    "who why will with you your".split()
+)
+
+
+class HashingEmbeddings(Embeddings):
+    """Local hashed n-gram embeddings (no network, deterministic).
+
+    Words and their character n-grams are hashed into a fixed number of
+    signed buckets, weighted with sublinear term frequency and L2-normalized,
+    so cosine similarity reflects lexical overlap including partial words
+    ("language" vs "languages").
+    """
+
+    def __init__(
+        self,
+        size: int = 384,
+        ngram_range: Tuple[int, int] = (3, 4),
+        stop_words: FrozenSet[str] = STOP_WORDS,
+    ):
+        self.size = size
+        self.ngram_range = ngram_range
+        self.stop_words = stop_words
+        self.model_id = f"hashing-v1:{size}:{ngram_range[0]}-{ngram_range[1]}"
+
+    def _features(self, text: str) -> Counter:
+        features = Counter()
+        low, high = self.ngram_range
+        for word in _TOKEN_RE.findall(text.lower()):
+            if word in self.stop_words:
+                continue
+            features[word] += 1
+            padded = f"<{word}>"
+            for n in range(low, high + 1):
+                for i in range(len(padded) - n + 1):
+                    features["#" + padded[i : i + n]] += 1
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an ``(n, size)`` float32 matrix of unit vectors."""
+        matrix = np.zeros((len(texts), self.size), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                matrix[row, h % self.size] += sign * (1.0 + math.log(count))
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
@@ -1,20 +1,292 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+import fnmatch
+import glob
+import mmap
+import os
+import re
 import shutil
+import threading
+import time
 from langchain.tools import tool
 
+# Largest slice of a file returned in one call; bigger files are summarized
+READ_LIMIT = 64 * 1024
+# Lines shown from each end of a file that is too large to return whole
+SUMMARY_LINES = 40
+
+# Results returned by search_files/list_directory per call
+RESULT_LIMIT = 100
+# Directories modified more recently than this are rescanned on every call
+RACY_WINDOW_NS = 2_000_000_000
+# Worker threads used by the batch copy/delete/write tools
+BATCH_WORKERS = 8
+
+
+class DirEntryInfo(NamedTuple):
+    name: str
+    is_dir: bool
+
+
+class DirectoryIndex:
+    """In-process cache of directory listings, keyed by path.
+
+    Each listing is stored with the directory's mtime and rescanned when it
+    changes (an entry was added, removed or renamed). Only names and types
+    are cached: a file rewritten in place doesn't touch its directory's
+    mtime, so sizes are read fresh by the caller. The least recently used
+    listings are dropped beyond ``max_dirs``; with ``max_dirs=0`` every call
+    scans the directory.
+    """
+
+    def __init__(self, max_dirs: int = 4096):
+        self.max_dirs = max_dirs
+        self.hits = 0
+        self.misses = 0
+        self._listings: "OrderedDict[str, Tuple[int, List[DirEntryInfo]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def entries(self, directory: str) -> List[DirEntryInfo]:
+        """Entries of ``directory`` sorted by name."""
+        key = os.path.abspath(directory)
+        mtime = os.stat(key).st_mtime_ns
+        with self._lock:
+            cached = self._listings.get(key)
+            if cached is not None and cached[0] == mtime:
+                self._listings.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        listing = self._scan(key)
+        # A change in the same mtime tick as the scan would go unnoticed,
+        # so only trust listings of directories that have settled
+        if self.max_dirs > 0 and time.time_ns() - mtime > RACY_WINDOW_NS:
+            with self._lock:
+                self._listings[key] = (mtime, listing)
+                self._listings.move_to_end(key)
+                while len(self._listings) > self.max_dirs:
+                    self._listings.popitem(last=False)
+        return listing
+
+    @staticmethod
+    def _scan(directory: str) -> List[DirEntryInfo]:
+        listing = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    # Don't follow directory symlinks, so walks can't loop
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                listing.append(DirEntryInfo(entry.name, is_dir))
+        listing.sort(key=lambda e: e.name)
+        return listing
+
+    def walk(
+        self, directory: str, descend: Optional[Callable[[str], bool]] = None
+    ) -> Iterator[Tuple[str, DirEntryInfo]]:
+        """Yield ``(relative_path, entry)`` depth-first in name order.
+
+        Subdirectories are entered when ``descend(relative_path)`` is true;
+        by default the whole tree is walked.
+        """
+        stack = [""]
+        while stack:
+            relative = stack.pop()
+            try:
+                listing = self.entries(os.path.join(directory, relative))
+            except OSError:
+                continue
+            subdirs = []
+            for entry in listing:
+                path = f"{relative}/{entry.name}" if relative else entry.name
+                yield path, entry
+                if entry.is_dir and (descend is None or descend(path)):
+                    subdirs.append(path)
+            stack.extend(reversed(subdirs))
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+
+
+directory_index = DirectoryIndex()
+
+
+def _glob_match(parts: List[str], segments: List[str]) -> bool:
+    """Match path parts against glob segments like ``Path.glob``.
+
+    Wildcards stay within one segment; a ``**`` segment matches any number
+    of directories, including none.
+    """
+    if not segments:
+        return not parts
+    if segments[0] == "**":
+        return any(_glob_match(parts[i:], segments[1:]) for i in range(len(parts) + 1))
+    return (
+        bool(parts)
+        and fnmatch.fnmatchcase(parts[0], segments[0])
+        and _glob_match(parts[1:], segments[1:])
+    )
+
+
+def _glob_may_contain(parts: List[str], segments: List[str]) -> bool:
+    """Whether a directory at ``parts`` can hold a match for ``segments``."""
+    for i, part in enumerate(parts):
+        if i == len(segments) or segments[i] == "**":
+            return i < len(segments)
+        if not fnmatch.fnmatchcase(part, segments[i]):
+            return False
+    return len(segments) > len(parts)
+
+
+def _page(total: int, offset: int, shown: int, more: bool = False) -> str:
+    """Footer telling the caller how to fetch the next page."""
+    end = offset + shown
+    if end >= total and not more:
+        return ""
+    return f"\n[showing {offset + 1}-{end}; continue with offset={end}]"
+
+
+def _decode(data: bytes) -> str:
+    # Ranges can split a multi-byte character, so never fail on decoding
+    return data.decode("utf-8", errors="replace")
+
+
+def _read_range(path: Path, offset: int, length: Optional[int]) -> str:
+    """Read ``length`` bytes from ``offset``, capped at ``READ_LIMIT``."""
+    size = path.stat().st_size
+    length = READ_LIMIT if length is None else min(length, READ_LIMIT)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(max(length, 0))
+    end = offset + len(data)
+    header = f"[bytes {offset}-{end} of {size}]"
+    if end < size:
+        header += f" (continue with offset={end})"
+    return f"{header}\n{_decode(data)}"
+
+
+def _read_lines(path: Path, start_line: int, end_line: Optional[int]) -> str:
+    """Stream lines ``start_line``..``end_line`` (1-based, inclusive).
+
+    Reads in chunks of at most ``READ_LIMIT`` bytes, so a huge line (minified
+    JSON, single-line logs) is cut at the limit instead of loaded whole.
+    """
+    chunks, used, last, footer = [], 0, start_line - 1, ""
+    with open(path, "rb") as f:
+        number = 0
+        while number < start_line - 1:
+            chunk = f.readline(READ_LIMIT)
+            if not chunk:
+                break
+            if chunk.endswith(b"\n"):
+                number += 1
+
+        number = start_line
+        while end_line is None or number <= end_line:
+            if used >= READ_LIMIT:
+                if f.read(1):
+                    footer = f"[truncated; continue with start_line={number}]\n"
+                break
+            chunk = f.readline(READ_LIMIT - used)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            used += len(chunk)
+            last = number
+            if not chunk.endswith(b"\n"):
+                # Either the file's last line or a line cut at the limit
+                position = f.tell()
+                if f.read(1):
+                    footer = (
+                        f"\n[line {number} truncated at {READ_LIMIT} bytes; "
+                        f"continue with offset={position}]\n"
+                    )
+                break
+            number += 1
+    if last < start_line:
+        return f"No lines in range {start_line}-{end_line or 'end'} of {path}"
+    text = _decode(b"".join(chunks)).replace("\r\n", "\n")
+    return f"[lines {start_line}-{last}]\n" + text + footer
+
+
+def _head_tail(path: Path, size: int) -> str:
+    """Summarize a large file by its first and last lines without loading it."""
+    budget = READ_LIMIT // 2
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        head_end = 0
+        for _ in range(SUMMARY_LINES):
+            newline = mm.find(b"\n", head_end, budget)
+            if newline < 0:
+                head_end = min(size, budget)
+                break
+            head_end = newline + 1
+
+        tail_start = size
+        floor = max(head_end, size - budget)
+        # Skip the file's trailing newline so it doesn't count as a line
+        search_end = size - 1 if mm[size - 1 : size] == b"\n" else size
+        for _ in range(SUMMARY_LINES):
+            newline = mm.rfind(b"\n", floor, search_end)
+            if newline < 0:
+                tail_start = floor
+                break
+            tail_start, search_end = newline + 1, newline
+
+        head, tail = mm[:head_end], mm[tail_start:]
+
+    return (
+        f"[{path} is {size} bytes; showing the first and last "
+        f"{SUMMARY_LINES} lines. Pass offset/length or start_line/end_line "
+        f"to read a specific part.]\n"
+        f"{_decode(head)}"
+        f"[... {tail_start - head_end} bytes omitted ...]\n"
+        f"{_decode(tail)}"
+    )
+
 
 @tool
-def read_file(path: str) -> str:
+def read_file(
+    path: str,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+) -> str:
     """Read contents of a file at the given path.
 
+    Small files are returned whole. Larger files return a head/tail summary
+    unless a byte range (offset/length) or line range (start_line/end_line)
+    is given; each call returns at most 64 KB.
+
     Args:
         path: Absolute or relative path to the file.
+        offset: Byte offset to start reading from.
+        length: Number of bytes to read.
+        start_line: First line to read (1-based).
+        end_line: Last line to read (inclusive).
 
     Returns:
         File contents as string or error message.
     """
     try:
-        return Path(path).read_text(encoding="utf-8")
+        file_path = Path(path)
+        if start_line is not None or end_line is not None:
+            return _read_lines(file_path, max(start_line or 1, 1), end_line)
+        if offset is not None or length is not None:
+            return _read_range(file_path, max(offset or 0, 0), length)
+
+        size = file_path.stat().st_size
+        if size <= READ_LIMIT:
+            return file_path.read_text(encoding="utf-8")
+        return _head_tail(file_path, size)
     except FileNotFoundError:
         return f"Error: File not found at {path}"
     except Exception as e:
@@ -41,21 +313,23 @@ def write_file(path: str, content: str) -> str:
 
 
 @tool
-def list_directory(path: str = ".") -> str:
+def list_directory(path: str = ".", limit: int = RESULT_LIMIT, offset: int = 0) -> str:
     """List all files and directories in the given path.
 
     Args:
         path: Directory path (defaults to current directory).
+        limit: Maximum number of entries to return (default: 100).
+        offset: Number of entries to skip, for paging through large directories.
 
     Returns:
         Formatted list of files and directories.
     """
     try:
-        items = list(Path(path).iterdir())
+        entries = directory_index.entries(path)
+        shown = entries[offset : offset + limit]
         return "\n".join(
-            f"{'DIR  ' if item.is_dir() else 'FILE '}{item.name}"
-            for item in sorted(items)
-        )
+            f"{'DIR  ' if entry.is_dir else 'FILE '}{entry.name}" for entry in shown
+        ) + _page(len(entries), offset, len(shown))
     except FileNotFoundError:
         return f"Error: Directory not found at {path}"
     except Exception as e:
@@ -106,32 +380,236 @@ def delete_file(path: str) -> str:
         return f"Error deleting file: {str(e)}"
 
 
+def _grep(path: str, regex, max_line: int = 200) -> Optional[str]:
+    """First line of ``path`` matching ``regex`` as ``"lineno: text"``."""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for number, line in enumerate(f, 1):
+                if "\0" in line:
+                    return None  # binary file
+                if regex.search(line):
+                    return f"{number}: {line.strip()[:max_line]}"
+    except OSError:
+        pass
+    return None
+
+
 @tool
-def search_files(directory: str = ".", pattern: str = "*") -> str:
+def search_files(
+    directory: str = ".",
+    pattern: str = "*",
+    recursive: bool = False,
+    content: Optional[str] = None,
+    limit: int = RESULT_LIMIT,
+    offset: int = 0,
+) -> str:
     """Search for files matching a glob pattern in a directory.
 
     Args:
         directory: Directory path to search in (defaults to current directory).
-        pattern: Glob pattern to match (e.g., "*.txt", "*.py", "test*").
+        pattern: Glob pattern to match (e.g., "*.txt", "*.py", "test*"). A
+            leading "**/" searches subdirectories too.
+        recursive: Search subdirectories as well.
+        content: Optional regular expression; only files containing a
+            matching line are returned, with the first matching line.
+        limit: Maximum number of results to return (default: 100).
+        offset: Number of results to skip, for paging through results.
 
     Returns:
         Formatted list of matching files with metadata (size, type).
     """
     try:
-        dir_path = Path(directory)
-        if not dir_path.exists():
+        if not Path(directory).is_dir():
             return f"Error: Directory not found at {directory}"
 
-        matches = list(dir_path.glob(pattern))
-        if not matches:
-            return f"No files found matching pattern {pattern} in {directory}"
+        segments = [part for part in pattern.split("/") if part not in ("", ".")]
+        if recursive and segments[:1] != ["**"]:
+            segments.insert(0, "**")
+        regex = re.compile(content) if content else None
 
-        results = []
-        for match in matches:
-            size = match.stat().st_size
-            file_type = "DIR" if match.is_dir() else "FILE"
-            results.append(f"{file_type} {match.name} ({size} bytes)")
+        def descend(relative: str) -> bool:
+            # Only enter directories the pattern can still match below
+            return _glob_may_contain(relative.split("/"), segments)
 
-        return f"Found {len(matches)} files matching {pattern}:\n" + "\n".join(results)
+        results, total, more = [], 0, False
+        for relative, entry in directory_index.walk(directory, descend):
+            if not _glob_match(relative.split("/"), segments):
+                continue
+            line = None
+            if regex is not None:
+                if entry.is_dir:
+                    continue
+                line = _grep(os.path.join(directory, relative), regex)
+                if line is None:
+                    continue
+            total += 1
+            if total <= offset:
+                continue
+            if len(results) == limit:
+                # Reading more files just to count them isn't worth it
+                if regex is not None:
+                    more = True
+                    break
+                continue
+            try:
+                # Sizes aren't cached, only the page being returned is stat'ed
+                stat = os.stat(os.path.join(directory, relative), follow_symlinks=False)
+            except OSError:
+                total -= 1
+                continue
+            file_type = "DIR" if entry.is_dir else "FILE"
+            result = f"{file_type} {relative} ({stat.st_size} bytes)"
+            results.append(f"{result}: {line}" if line else result)
+
+        if not results:
+            if total:
+                return f"No more files matching pattern {pattern} past offset {offset}"
+            return f"No files found matching pattern {pattern} in {directory}"
+
+        count = f"{offset + len(results)}+" if more else str(total)
+        return (
+            f"Found {count} files matching {pattern}:\n"
+            + "\n".join(results)
+            + _page(total, offset, len(results), more)
+        )
+    except re.error as e:
+        return f"Error searching files: invalid content pattern - {str(e)}"
     except Exception as e:
         return f"Error searching files: {str(e)}"
+
+
+def _expand(paths: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """Expand globs into ``(path, name relative to the glob's base)`` pairs.
+
+    Literal paths are kept as given and named by their basename; a glob
+    with no matches yields ``(pattern, None)`` so it can be reported.
+    """
+    items, seen = [], set()
+    for path in paths:
+        if not glob.has_magic(path):
+            matches = [(path, os.path.basename(os.path.normpath(path)))]
+        else:
+            parts = Path(path).parts
+            static = next(i for i, part in enumerate(parts) if glob.has_magic(part))
+            base = os.path.join(*parts[:static]) if static else "."
+            matches = [
+                (match, os.path.relpath(match, base))
+                for match in sorted(glob.glob(path, recursive=True))
+                if os.path.isfile(match)
+            ] or [(path, None)]
+        for match in matches:
+            if match[0] not in seen:
+                seen.add(match[0])
+                items.append(match)
+    return items
+
+
+def _run_batch(action: str, items: List[Tuple[str, Callable[[], None]]]) -> str:
+    """Run each item's operation on a thread pool and summarize outcomes.
+
+    ``items`` are ``(label, operation)`` pairs; an exception marks that item
+    as failed without stopping the rest.
+    """
+
+    def attempt(operation):
+        try:
+            operation()
+            return None
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+
+    with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as executor:
+        errors = list(executor.map(attempt, [operation for _, operation in items]))
+
+    failed = [(label, error) for (label, _), error in zip(items, errors) if error]
+    done = [label for (label, _), error in zip(items, errors) if not error]
+    summary = f"{action} {len(done)}/{len(items)} files"
+    if failed:
+        summary += f" ({len(failed)} failed)"
+    lines = [summary]
+    lines.extend(f"ERR {label}: {error}" for label, error in failed)
+    lines.extend(f"OK  {label}" for label in done[:RESULT_LIMIT])
+    if len(done) > RESULT_LIMIT:
+        lines.append(f"... and {len(done) - RESULT_LIMIT} more OK")
+    return "\n".join(lines)
+
+
+def _no_match(pattern: str):
+    raise FileNotFoundError(f"no files match {pattern}")
+
+
+def _duplicate(target: str, first: str):
+    raise FileExistsError(f"{target} is already the target of {first}")
+
+
+def _copy(source: str, destination: str):
+    if not os.path.isfile(source):
+        raise FileNotFoundError("source file not found")
+    os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+    shutil.copy2(source, destination)
+
+
+def _write(path: str, content: str):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(content, encoding="utf-8")
+
+
+@tool
+def copy_files(sources: List[str], destination: str) -> str:
+    """Copy many files into a destination directory in one call.
+
+    Args:
+        sources: File paths or glob patterns (e.g. "data/*.csv",
+            "src/**/*.py"). Files matched by a glob keep their path relative
+            to the pattern's fixed prefix.
+        destination: Destination directory (created if needed).
+
+    Returns:
+        Per-file summary with the number copied and any failures. Sources
+        that would land on the same target (e.g. "a/x.txt" and "b/x.txt")
+        are copied once, from the first, and the rest reported as failed.
+    """
+    items, targets = [], {}
+    for source, name in _expand(sources):
+        if name is None:
+            items.append((source, partial(_no_match, source)))
+            continue
+        target = os.path.join(destination, name)
+        label = f"{source} -> {target}"
+        first = targets.setdefault(os.path.normpath(target), source)
+        if first != source:
+            items.append((label, partial(_duplicate, target, first)))
+        else:
+            items.append((label, partial(_copy, source, target)))
+    return _run_batch("Copied", items)
+
+
+@tool
+def delete_files(paths: List[str]) -> str:
+    """Delete many files in one call.
+
+    Args:
+        paths: File paths or glob patterns (e.g. "logs/*.log").
+
+    Returns:
+        Per-file summary with the number deleted and any failures.
+    """
+    items = [
+        (path, partial(_no_match if name is None else os.remove, path))
+        for path, name in _expand(paths)
+    ]
+    return _run_batch("Deleted", items)
+
+
+@tool
+def write_files(files: Dict[str, str]) -> str:
+    """Write many files in one call.
+
+    Args:
+        files: Mapping of file path to the text content to write.
+
+    Returns:
+        Per-file summary with the number written and any failures.
+    """
+    items = [(path, partial(_write, path, content)) for path, content in files.items()]
+    return _run_batch("Wrote", items)
@@ -1,81 +1,652 @@
-from langchain_core.vectorstores import InMemoryVectorStore
-from langchain_core.embeddings import FakeEmbeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_core.embeddings import Embeddings
 from pathlib import Path
 import json
-from typing import List, Dict, Optional
+import hashlib
+import os
+import re
+import threading
+import uuid
+from contextlib import contextmanager
+from collections import OrderedDict, deque
+from typing import (
+    Any,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Dict,
+    Optional,
+    Sequence,
+    Tuple,
+)
 from datetime import datetime
 from langchain_core.documents import Document
+import numpy as np
+
+
+class IVFIndex:
+    """Approximate nearest-neighbour index using an inverted file (IVF).
+
+    Vectors are partitioned around ``nlist`` centroids learned with spherical
+    k-means; a query only scores the members of its ``nprobe`` closest
+    partitions. Inserts assign a vector to its nearest centroid and deletes
+    swap-remove it from its list, both in O(1) plus one centroid product.
+    The index retrains itself once the data has grown ``retrain_factor``
+    times past the size it was last trained on.
+    """
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        min_train_size: int = 1024,
+        retrain_factor: float = 4.0,
+        iterations: int = 10,
+        seed: int = 0,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.retrain_factor = retrain_factor
+        self.iterations = iterations
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        self._lists: List[List[int]] = []
+        self._where: Dict[int, Tuple[int, int]] = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def needs_training(self, size: int) -> bool:
+        if not self.is_trained:
+            return size >= self.min_train_size
+        return size >= self.trained_size * self.retrain_factor
+
+    def train(self, vectors: np.ndarray):
+        """Learn centroids from ``vectors`` and drop existing assignments."""
+        rng = np.random.default_rng(self.seed)
+        nlist = self.nlist or max(1, int(np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+
+        sample = vectors
+        if len(vectors) > 256 * nlist:
+            sample = vectors[rng.choice(len(vectors), 256 * nlist, replace=False)]
+
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            counts = np.bincount(assign, minlength=nlist)
+            order = np.argsort(assign, kind="stable")
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            nonempty = counts > 0
+            sums = np.zeros_like(centroids)
+            sums[nonempty] = np.add.reduceat(sample[order], starts[nonempty], axis=0)
+            # Re-seed empty partitions from random points
+            empty = np.flatnonzero(~nonempty)
+            sums[empty] = sample[rng.choice(len(sample), len(empty))]
+            centroids = _normalize_rows(sums)
+
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = len(vectors)
+        self._lists = [[] for _ in range(nlist)]
+        self._where = {}
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Nearest centroid for each vector."""
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def add(self, slots: Sequence[int], vectors: np.ndarray, lists=None):
+        """Index ``slots``; ``lists`` may carry precomputed assignments.
+
+        Entries of ``lists`` that are negative or out of range are assigned
+        from ``vectors``.
+        """
+        if lists is None:
+            lists = self.assign(vectors)
+        else:
+            lists = np.array(lists, dtype=np.int64)
+            missing = (lists < 0) | (lists >= len(self._lists))
+            if missing.any():
+                lists[missing] = self.assign(vectors[missing])
+        for slot, list_id in zip(slots, lists):
+            slot, list_id = int(slot), int(list_id)
+            if slot in self._where:
+                self.remove([slot])
+            members = self._lists[list_id]
+            self._where[slot] = (list_id, len(members))
+            members.append(slot)
+
+    def remove(self, slots: Sequence[int]):
+        for slot in slots:
+            location = self._where.pop(int(slot), None)
+            if location is None:
+                continue
+            list_id, pos = location
+            members = self._lists[list_id]
+            last = members.pop()
+            if pos < len(members):
+                members[pos] = last
+                self._where[last] = (list_id, pos)
+
+    def list_of(self, slots: Sequence[int]) -> np.ndarray:
+        return np.array([self._where[int(slot)][0] for slot in slots], dtype=np.int32)
+
+    def save(self, path: str, lists: np.ndarray):
+        """Save centroids and per-row assignments (``lists``) to ``path``."""
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                centroids=self.centroids,
+                lists=np.asarray(lists, dtype=np.int32),
+                trained_size=self.trained_size,
+            )
+
+    def load(self, path: str, dim: int) -> Optional[np.ndarray]:
+        """Load centroids from ``path`` and return the saved row assignments."""
+        try:
+            with np.load(path) as data:
+                centroids = data["centroids"]
+                lists = data["lists"]
+                trained_size = int(data["trained_size"])
+        except (OSError, KeyError, ValueError):
+            return None
+        if centroids.ndim != 2 or centroids.shape[1] != dim:
+            return None
+
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = trained_size
+        self._lists = [[] for _ in range(len(centroids))]
+        self._where = {}
+        return lists
+
+    def candidates(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Slots in the ``nprobe`` partitions closest to ``query``."""
+        nprobe = min(nprobe or self.nprobe, len(self._lists))
+        closest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.fromiter(
+            (slot for list_id in closest for slot in self._lists[list_id]),
+            dtype=np.int64,
+        )
+
+
+class NumpyVectorStore(VectorStore):
+    """Vector store keeping unit-normalized float32 vectors in one NumPy matrix.
+
+    Search is a single matrix-vector product over all stored rows. Rows can be
+    added with precomputed vectors via ``add_vectors`` so persisted embeddings
+    never need to be recomputed. With an ``IVFIndex`` attached, searches only
+    score the candidate rows the index returns once it has been trained.
+
+    Rows live in fixed slots of a preallocated matrix, tracked by explicit
+    document IDs in insertion order. ``delete(ids=...)`` frees slots in
+    O(deleted) for reuse by later inserts without touching the survivors, so
+    the matrix behaves as a ring buffer when the oldest entries are evicted.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        capacity: int = 16,
+        index: Optional[IVFIndex] = None,
+    ):
+        self.embedding = embedding
+        self.index = index
+        self._capacity = max(capacity, 1)
+        self._vectors: Optional[np.ndarray] = None
+        self._valid = np.zeros(0, dtype=bool)
+        self._docs: List[Optional[Document]] = []
+        self._slot_of: "OrderedDict[str, int]" = OrderedDict()
+        self._free: List[int] = []
+        self._high_water = 0
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @property
+    def ids(self) -> List[str]:
+        """Stored document IDs, oldest first."""
+        return list(self._slot_of)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Stored vectors in insertion order."""
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._vectors[list(self._slot_of.values())]
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into a unit-normalized float32 matrix."""
+        if not texts:
+            return np.zeros((0, self.vectors.shape[1]), dtype=np.float32)
+        if hasattr(self.embedding, "embed"):
+            vectors = np.asarray(self.embedding.embed(texts), dtype=np.float32)
+        else:
+            vectors = np.asarray(
+                self.embedding.embed_documents(list(texts)), dtype=np.float32
+            )
+        return _normalize_rows(vectors)
+
+    def _embed_query(self, query: str) -> np.ndarray:
+        return self.embed_texts([query])[0]
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[Dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return self.add_vectors(self.embed_texts(texts), texts, metadatas, ids=ids)
+
+    def add_vectors(
+        self,
+        vectors: np.ndarray,
+        texts: List[str],
+        metadatas: Optional[List[Dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        lists: Optional[np.ndarray] = None,
+    ) -> List[str]:
+        """Add texts with precomputed vectors (one row per text).
+
+        Adding an ID that is already stored replaces that entry in place.
+        ``lists`` optionally carries saved IVF assignments for the rows.
+        """
+        vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        if len(vectors) != len(texts):
+            raise ValueError("Number of vectors must match number of texts")
+        if not texts:
+            return []
+
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+
+        self._reserve(len(self._slot_of) + len(texts), vectors.shape[1])
+        slots = []
+        for doc_id, vector, text, metadata in zip(ids, vectors, texts, metadatas):
+            slot = self._slot_of.get(doc_id)
+            if slot is None:
+                slot = self._free.pop() if self._free else self._high_water
+                self._high_water = max(self._high_water, slot + 1)
+                self._slot_of[doc_id] = slot
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._docs[slot] = Document(
+                id=doc_id, page_content=text, metadata=dict(metadata)
+            )
+            slots.append(slot)
+
+        if self.index is not None:
+            if self.index.needs_training(len(self._slot_of)):
+                self.train_index()
+            elif self.index.is_trained:
+                self.index.add(slots, vectors, lists)
+        return list(ids)
+
+    def train_index(self):
+        """(Re)train the attached index on every stored vector."""
+        slots = np.fromiter(self._slot_of.values(), dtype=np.int64)
+        vectors = self._vectors[slots]
+        self.index.train(vectors)
+        self.index.add(slots, vectors)
+
+    def index_lists(self) -> Optional[np.ndarray]:
+        """IVF assignment of each stored row in insertion order, if indexed."""
+        if self.index is None or not self.index.is_trained:
+            return None
+        if len(self.index) != len(self._slot_of):
+            return None
+        return self.index.list_of(list(self._slot_of.values()))
+
+    def _reserve(self, size: int, dim: int):
+        """Grow the slot matrix geometrically to hold ``size`` entries."""
+        if self._vectors is None:
+            capacity = max(size, self._capacity)
+            self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+            self._valid = np.zeros(capacity, dtype=bool)
+            self._docs = [None] * capacity
+            return
+        if self._vectors.shape[1] != dim:
+            raise ValueError(
+                f"Vector dimension {dim} does not match store dimension "
+                f"{self._vectors.shape[1]}"
+            )
+        if size > len(self._vectors):
+            capacity = max(size, 2 * len(self._vectors))
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            grown[: self._high_water] = self._vectors[: self._high_water]
+            self._vectors = grown
+            self._valid = np.concatenate(
+                [self._valid, np.zeros(capacity - len(self._valid), dtype=bool)]
+            )
+            self._docs.extend([None] * (capacity - len(self._docs)))
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids is None:
+            ids = list(self._slot_of)
+
+        deleted = False
+        for doc_id in ids:
+            slot = self._slot_of.pop(doc_id, None)
+            if slot is None:
+                continue
+            if self.index is not None:
+                self.index.remove([slot])
+            self._valid[slot] = False
+            self._docs[slot] = None
+            self._free.append(slot)
+            deleted = True
+        return deleted
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        return [
+            self._docs[self._slot_of[doc_id]]
+            for doc_id in ids
+            if doc_id in self._slot_of
+        ]
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: Sequence[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        if not self._slot_of or k <= 0:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        k = min(k, len(self._slot_of))
+        if self.index is not None and self.index.is_trained:
+            candidates = self.index.candidates(query)
+            if len(candidates) >= k:
+                scores = self._vectors[candidates] @ query
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top], kind="stable")]
+                return [(self._docs[candidates[i]], float(scores[i])) for i in top]
+
+        scores = self._vectors[: self._high_water] @ query
+        scores[~self._valid[: self._high_water]] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._docs[i], float(scores[i])) for i in top]
+
+    def similarity_search_by_vector(
+        self, embedding: Sequence[float], k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [
+            doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        if not self._slot_of:
+            return []
+        return self.similarity_search_by_vector_with_score(self._embed_query(query), k)
+
+    def similarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[Dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding=embedding)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+_ELLIPSIS = " … "
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: one per CJK character, one per ~4 other characters.
+
+    Close enough to GLM and OpenAI tokenizers to budget a prompt without
+    loading one.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + -(-(len(text) - cjk) // 4)
+
+
+def shorten_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut the middle out of ``text`` so it fits ``max_tokens``.
+
+    The head and tail are kept (two thirds / one third) since that is
+    where questions and conclusions usually are.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    keep = len(text) * max_tokens // estimate_tokens(text)
+    while True:
+        head = keep * 2 // 3
+        tail = keep - head
+        shortened = text[:head].rstrip() + _ELLIPSIS + text[len(text) - tail :].lstrip()
+        if keep <= 0 or estimate_tokens(shortened) <= max_tokens:
+            return shortened if keep > 0 else ""
+        keep -= max(1, keep // 10)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
 
 
 class ConversationRAGMemory:
-    """RAG-based conversation memory using InMemoryVectorStore."""
+    """RAG-based conversation memory using a NumPy vector store.
+
+    Persistence is split into a compacted JSON snapshot (``memory_file``) and
+    an append-only JSONL journal (``<memory_file>.journal``). Each turn only
+    appends its new messages to the journal; the snapshot is rewritten once
+    the journal grows past ``compact_every`` entries.
+
+    Message vectors are persisted alongside as float32 (``<memory_file>.npy``
+    for the snapshot, ``<memory_file>.journal.f32`` for the journal), so
+    startup loads them instead of re-embedding every message.
+
+    Messages are kept oldest-first with explicit IDs; once ``max_size`` is
+    exceeded the oldest ones are evicted with ``vectorstore.delete(ids=...)``
+    and their slots are reused by the next turn.
+
+    With ``index_type="ivf"`` retrieval goes through an ``IVFIndex`` whose
+    centroids and assignments are saved to ``<memory_file>.ivf.npz``, which
+    keeps search sublinear for memories with hundreds of thousands of turns.
+    """
+
+    def __init__(
+        self,
+        memory_file: str = ".agent_memory.json",
+        max_size: int = 10,
+        compact_every: Optional[int] = None,
+        embeddings: Optional[Embeddings] = None,
+        index_type: str = "exact",
+        nprobe: int = 8,
+    ):
+        if index_type not in ("exact", "ivf"):
+            raise ValueError(f"Unknown memory index type: {index_type}")
 
-    def __init__(self, memory_file: str = ".agent_memory.json", max_size: int = 10):
         self.memory_file = memory_file
+        self.journal_file = f"{memory_file}.journal"
+        self.vectors_file = f"{memory_file}.npy"
+        self.journal_vectors_file = f"{self.journal_file}.f32"
+        self.index_file = f"{memory_file}.ivf.npz"
+        self.index_type = index_type
+        self.nprobe = nprobe
         self.max_size = max_size
-        self.embeddings = FakeEmbeddings(size=768)
-        self.vectorstore = InMemoryVectorStore(embedding=self.embeddings)
+        self.compact_every = compact_every or max(max_size, 50)
+        if embeddings is None:
+            from tools.embeddings import HashingEmbeddings
+
+            embeddings = HashingEmbeddings()
+        self.embeddings = embeddings
+        self.embedding_id = getattr(embeddings, "model_id", type(embeddings).__name__)
+        self.vectorstore = self._new_vectorstore()
+        self.messages: Deque[Dict] = deque()
+        self._journal_entries = 0
+        self.lock = threading.RLock()
 
         self.load_from_file()
 
     def load_from_file(self):
-        """Load messages from JSON file and add to vector store."""
+        """Load the snapshot, replay the journal and add messages to vector store."""
+        messages = []
+        embedding_id = None
         if Path(self.memory_file).exists():
             with open(self.memory_file, "r") as f:
                 data = json.load(f)
                 messages = data.get("messages", [])
+                embedding_id = data.get("embedding")
+
+        vectors = None
+        snapshot_size = len(messages)
+        if messages and embedding_id == self.embedding_id:
+            vectors = self._load_vectors(self.vectors_file, len(messages))
+
+        journal, torn = self._read_journal()
+        self._journal_entries = len(journal)
+        if journal:
+            journal_vectors = None
+            if embedding_id in (None, self.embedding_id):
+                journal_vectors = self._load_vectors(
+                    self.journal_vectors_file, len(journal)
+                )
+            vectors = self._join_vectors(messages, vectors, journal, journal_vectors)
+            messages.extend(journal)
 
-                for msg in messages:
-                    doc = Document(
-                        page_content=msg.get("content", ""),
-                        metadata={
-                            "role": msg.get("role", ""),
-                            "timestamp": msg.get("timestamp", ""),
-                        },
-                    )
-                    self.vectorstore.add_documents([doc])
+        self.messages = deque(
+            self._normalize(msg) for msg in messages[-self.max_size :]
+        )
+        self.vectorstore = self._new_vectorstore()
+        stale = False
+        if self.messages:
+            lists = None
+            if vectors is None:
+                stale = True
+                vectors = self.vectorstore.embed_texts(
+                    [msg["content"] for msg in self.messages]
+                )
+            elif self.vectorstore.index is not None:
+                lists = self._load_index_lists(snapshot_size, len(messages))
+            self.vectorstore.add_vectors(
+                vectors[-len(self.messages) :],
+                [msg["content"] for msg in self.messages],
+                [self._metadata(msg) for msg in self.messages],
+                ids=[msg["id"] for msg in self.messages],
+                lists=lists,
+            )
 
-                self._enforce_size_limit()
+        # Compact a torn journal so new appends never land on a partial line,
+        # and persist vectors that had to be recomputed
+        if torn or stale or self._journal_entries >= self.compact_every:
+            self.compact()
 
     def save_to_file(self):
-        """Save all messages to JSON file."""
-        all_docs = self.vectorstore.similarity_search("", k=100)
+        """Save all messages to the JSON snapshot and truncate the journal."""
+        self.compact()
 
-        messages = []
-        for doc in all_docs:
-            messages.append(
-                {
-                    "role": doc.metadata.get("role", ""),
-                    "content": doc.page_content,
-                    "timestamp": doc.metadata.get("timestamp", ""),
-                }
-            )
+    def compact(self):
+        """Rewrite the snapshot from the current messages and reset the journal."""
+        with self.lock:
+            self._compact()
+
+    @property
+    def pending_journal_entries(self) -> int:
+        """Messages written to the journal since the last compaction."""
+        return self._journal_entries
 
-        messages = messages[-self.max_size :]
+    def _compact(self):
+        path = Path(self.memory_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
 
-        Path(self.memory_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.memory_file, "w") as f:
-            json.dump({"messages": messages}, f, indent=2)
+        # Vectors first: a crash between the two writes leaves a row-count
+        # mismatch, which load_from_file detects and re-embeds
+        vectors_tmp = path.with_name(path.name + ".npy.tmp")
+        with open(vectors_tmp, "wb") as f:
+            np.save(f, self.vectorstore.vectors)
+        os.replace(vectors_tmp, self.vectors_file)
+
+        lists = self.vectorstore.index_lists()
+        if lists is not None:
+            index_tmp = path.with_name(path.name + ".ivf.npz.tmp")
+            self.vectorstore.index.save(index_tmp, lists)
+            os.replace(index_tmp, self.index_file)
+        else:
+            Path(self.index_file).unlink(missing_ok=True)
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"embedding": self.embedding_id, "messages": list(self.messages)},
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, path)
+
+        Path(self.journal_file).unlink(missing_ok=True)
+        Path(self.journal_vectors_file).unlink(missing_ok=True)
+        self._journal_entries = 0
 
     def add_messages(self, messages: List[Dict]):
         """Add new messages to conversation memory."""
         timestamp = datetime.now().isoformat()
 
-        for msg in messages:
-            doc = Document(
-                page_content=msg.get("content", ""),
-                metadata={"role": msg.get("role", ""), "timestamp": timestamp},
+        new_messages = [
+            {
+                "id": uuid.uuid4().hex,
+                "role": msg.get("role", ""),
+                "content": msg.get("content", ""),
+                "timestamp": timestamp,
+            }
+            for msg in messages
+        ]
+        if not new_messages:
+            return
+
+        vectors = self.vectorstore.embed_texts([m["content"] for m in new_messages])
+        with self.lock:
+            self.messages.extend(new_messages)
+            self.vectorstore.add_vectors(
+                vectors,
+                [msg["content"] for msg in new_messages],
+                [self._metadata(msg) for msg in new_messages],
+                ids=[msg["id"] for msg in new_messages],
             )
-            self.vectorstore.add_documents([doc])
+            self._append_to_journal(new_messages, vectors)
 
-        self._enforce_size_limit()
-        self.save_to_file()
+            self._enforce_size_limit()
+            if self._journal_entries >= self.compact_every:
+                self._compact()
 
     def retrieve_relevant_context(self, query: str, k: int = 3) -> str:
         """Retrieve top-k most relevant messages for context."""
         try:
             # Search vector store for relevant documents
-            relevant_docs = self.vectorstore.similarity_search(query, k=k)
+            with self.lock:
+                relevant_docs = self.vectorstore.similarity_search(query, k=k)
 
             if not relevant_docs:
                 return ""
@@ -92,17 +663,333 @@ class ConversationRAGMemory:
             # Handle errors gracefully (e.g., vector store not initialized)
             return ""
 
+    def build_context(
+        self,
+        query: str,
+        max_tokens: int = 1000,
+        candidates: int = 8,
+        recency_weight: float = 0.3,
+        max_entry_tokens: Optional[int] = None,
+    ) -> Tuple[str, int]:
+        """Pack the most useful past messages into a token budget.
+
+        The top ``candidates`` messages by similarity are ranked by
+        ``(1 - recency_weight) * similarity + recency_weight * recency``,
+        where recency runs from 0 (oldest candidate) to 1 (newest). They are
+        added best first; entries longer than ``max_entry_tokens`` (default
+        a third of the budget), or than what is left of it, are shortened
+        by cutting out their middle. Chosen messages are listed oldest first.
+
+        Returns:
+            The context text ("" if nothing fits) and its estimated tokens.
+        """
+        header = "Relevant conversation:"
+        budget = max_tokens - estimate_tokens(header) - 1
+        if budget <= 0:
+            return "", 0
+        if max_entry_tokens is None:
+            max_entry_tokens = max(max_tokens // 3, 1)
+
+        try:
+            with self.lock:
+                scored = self.vectorstore.similarity_search_with_score(
+                    query, k=candidates
+                )
+        except Exception:
+            return "", 0
+        if not scored:
+            return "", 0
+
+        # ISO timestamps sort chronologically; ties keep similarity order
+        by_age = sorted(
+            range(len(scored)), key=lambda i: scored[i][0].metadata.get("timestamp", "")
+        )
+        recency = {i: rank / max(len(scored) - 1, 1) for rank, i in enumerate(by_age)}
+        ranked = sorted(
+            range(len(scored)),
+            key=lambda i: (1 - recency_weight) * scored[i][1]
+            + recency_weight * recency[i],
+            reverse=True,
+        )
+
+        chosen = {}
+        used = 0
+        for i in ranked:
+            doc = scored[i][0]
+            prefix = f"{doc.metadata.get('role', '')}: "
+            room = min(max_entry_tokens, budget - used) - estimate_tokens(prefix) - 1
+            # Skip entries that would be cut to a useless stub
+            if room < min(16, max_entry_tokens // 2):
+                continue
+            line = prefix + shorten_to_tokens(doc.page_content, room)
+            chosen[i] = line
+            used += estimate_tokens(line) + 1
+
+        if not chosen:
+            return "", 0
+        lines = [chosen[i] for i in by_age if i in chosen]
+        text = header + "\n" + "\n".join(lines)
+        return text, estimate_tokens(header) + 1 + used
+
     def _enforce_size_limit(self):
-        """Keep only most recent max_size messages."""
-        all_docs = self.vectorstore.similarity_search("", k=100)
+        """Keep only most recent max_size messages by evicting the oldest."""
+        overflow = len(self.messages) - self.max_size
+        if overflow > 0:
+            evicted = [self.messages.popleft()["id"] for _ in range(overflow)]
+            self.vectorstore.delete(ids=evicted)
+
+    def _new_vectorstore(self) -> NumpyVectorStore:
+        index = IVFIndex(nprobe=self.nprobe) if self.index_type == "ivf" else None
+        # Headroom for one turn's worth of messages before eviction runs
+        return NumpyVectorStore(
+            embedding=self.embeddings, capacity=self.max_size + 2, index=index
+        )
+
+    def _load_index_lists(self, snapshot_size: int, total: int) -> Optional[np.ndarray]:
+        """Load saved IVF centroids and align their row assignments to memory.
+
+        Saved assignments cover the snapshot rows; journal rows are marked -1
+        so the index assigns them on insert.
+        """
+        if not Path(self.index_file).exists():
+            return None
+        saved = self.vectorstore.index.load(self.index_file, self._embedding_dim())
+        if saved is None or len(saved) != snapshot_size:
+            return None
+        lists = np.full(total, -1, dtype=np.int64)
+        lists[:snapshot_size] = saved
+        return lists[-len(self.messages) :]
 
-        if len(all_docs) > self.max_size:
-            recent_docs = all_docs[-self.max_size :]
+    def _append_to_journal(self, messages: List[Dict], vectors: np.ndarray):
+        """Append messages to the journal, one JSON object per line.
 
-            self.vectorstore = InMemoryVectorStore(embedding=self.embeddings)
-            self.vectorstore.add_documents(recent_docs)
+        Vectors are appended first so a torn write can only ever leave extra
+        vector rows. Replay then finds more rows than messages, re-embeds the
+        journal and compacts, so later appends never land after the orphans.
+        """
+        path = Path(self.journal_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_vectors_file, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(msg) + "\n" for msg in messages))
+        self._journal_entries += len(messages)
+
+    def _read_journal(self) -> Tuple[List[Dict], bool]:
+        """Read journal entries, skipping a torn trailing line from a crash.
+
+        Returns:
+            The decoded entries and whether any line had to be skipped.
+        """
+        path = Path(self.journal_file)
+        if not path.exists():
+            return [], False
+
+        entries = []
+        torn = False
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    torn = True
+        return entries, torn
+
+    def _load_vectors(self, vectors_file: str, rows: int) -> Optional[np.ndarray]:
+        """Load ``rows`` persisted vectors, or None if missing or inconsistent.
+
+        Any row count other than ``rows`` means a write was torn, and rows
+        can no longer be matched to messages by position.
+        """
+        path = Path(vectors_file)
+        if not path.exists():
+            return None
+        try:
+            if path.suffix == ".npy":
+                vectors = np.load(path, mmap_mode="r")
+            else:
+                dim = self._embedding_dim()
+                vectors = np.fromfile(path, dtype=np.float32)
+                if len(vectors) % dim:
+                    return None
+                vectors = vectors.reshape(-1, dim)
+        except (OSError, ValueError):
+            return None
+        if vectors.ndim != 2 or len(vectors) != rows:
+            return None
+        if vectors.shape[1] != self._embedding_dim():
+            return None
+        return vectors
+
+    def _join_vectors(self, messages, vectors, journal, journal_vectors):
+        if journal_vectors is None or (messages and vectors is None):
+            return None
+        if not messages:
+            return np.asarray(journal_vectors)
+        return np.concatenate([vectors, journal_vectors])
+
+    def _embedding_dim(self) -> int:
+        size = getattr(self.embeddings, "size", None)
+        if size is None:
+            size = len(self.embeddings.embed_query(""))
+        return size
+
+    @staticmethod
+    def _normalize(msg: Dict) -> Dict:
+        return {
+            "id": msg.get("id") or uuid.uuid4().hex,
+            "role": msg.get("role", ""),
+            "content": msg.get("content", ""),
+            "timestamp": msg.get("timestamp", ""),
+        }
+
+    @staticmethod
+    def _metadata(msg: Dict) -> Dict:
+        return {"role": msg.get("role", ""), "timestamp": msg.get("timestamp", "")}
 
     def clear(self):
         """Clear all conversation history."""
-        self.vectorstore = InMemoryVectorStore(embedding=self.embeddings)
-        self.save_to_file()
+        with self.lock:
+            self.messages = deque()
+            self.vectorstore = self._new_vectorstore()
+            self._compact()
+
+
+class SessionMemoryPool:
+    """Conversation memory sharded by session ID.
+
+    Each session gets its own ``ConversationRAGMemory`` (and files) under
+    ``memory_dir``, loaded lazily on first use. At most ``max_shards`` stay
+    in memory; the least recently used shard is compacted to disk and
+    dropped when another one is loaded. Shards in use through ``session()``
+    are pinned and never evicted mid-request.
+
+    The ``None`` session maps to ``default_file`` so single-user setups keep
+    using ``Config.MEMORY_FILE``.
+    """
+
+    def __init__(
+        self,
+        memory_dir: str = ".agent_memory",
+        max_shards: int = 64,
+        default_file: Optional[str] = None,
+        **memory_kwargs: Any,
+    ):
+        self.memory_dir = memory_dir
+        self.max_shards = max_shards
+        self.default_file = default_file or str(Path(memory_dir) / "default.json")
+        self.memory_kwargs = memory_kwargs
+        self._shards: "OrderedDict[Optional[str], ConversationRAGMemory]" = (
+            OrderedDict()
+        )
+        self._pins: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._shards)
+
+    @property
+    def loaded_sessions(self) -> List[Optional[str]]:
+        """Sessions currently held in memory, least recently used first."""
+        with self._lock:
+            return list(self._shards)
+
+    def shard_file(self, session_id: Optional[str]) -> str:
+        """Memory file backing ``session_id``."""
+        if session_id is None:
+            return self.default_file
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id)[:64]
+        digest = hashlib.sha1(session_id.encode("utf-8")).hexdigest()[:8]
+        return str(Path(self.memory_dir) / f"{safe}-{digest}.json")
+
+    def get(self, session_id: Optional[str] = None) -> ConversationRAGMemory:
+        """Return the shard for ``session_id``, loading it if needed."""
+        with self._lock:
+            shard = self._shards.get(session_id)
+            if shard is not None:
+                self._shards.move_to_end(session_id)
+                return shard
+
+        # Load outside the pool lock so other sessions aren't blocked on disk
+        loaded = ConversationRAGMemory(
+            memory_file=self.shard_file(session_id), **self.memory_kwargs
+        )
+
+        with self._lock:
+            shard = self._shards.get(session_id)
+            if shard is None:
+                shard = self._shards[session_id] = loaded
+            self._shards.move_to_end(session_id)
+
+        self._evict_cold_shards()
+        return shard
+
+    def acquire(self, session_id: Optional[str] = None) -> ConversationRAGMemory:
+        """Pin and return the shard for ``session_id``; pair with ``release``."""
+        with self._lock:
+            self._pins[session_id] = self._pins.get(session_id, 0) + 1
+        try:
+            return self.get(session_id)
+        except BaseException:
+            self.release(session_id)
+            raise
+
+    def release(self, session_id: Optional[str] = None):
+        """Unpin a shard taken with ``acquire``."""
+        with self._lock:
+            self._pins[session_id] -= 1
+            if not self._pins[session_id]:
+                del self._pins[session_id]
+        self._evict_cold_shards()
+
+    @contextmanager
+    def session(
+        self, session_id: Optional[str] = None
+    ) -> Iterator[ConversationRAGMemory]:
+        """Pin the shard for ``session_id`` while the block runs."""
+        shard = self.acquire(session_id)
+        try:
+            yield shard
+        finally:
+            self.release(session_id)
+
+    def evict(self, session_id: Optional[str]) -> bool:
+        """Flush a shard to disk and drop it from memory."""
+        with self._lock:
+            shard = self._shards.get(session_id)
+        return shard is not None and self._evict(session_id, shard)
+
+    def close(self):
+        """Flush and drop every unpinned shard."""
+        with self._lock:
+            shards = list(self._shards.items())
+        for session_id, shard in shards:
+            self._evict(session_id, shard)
+
+    def _evict_cold_shards(self):
+        """Evict unpinned least recently used shards above ``max_shards``."""
+        with self._lock:
+            overflow = len(self._shards) - self.max_shards
+            cold = [
+                (session_id, shard)
+                for session_id, shard in self._shards.items()
+                if not self._pins.get(session_id)
+            ][: max(overflow, 0)]
+        for session_id, shard in cold:
+            self._evict(session_id, shard)
+
+    def _evict(self, session_id: Optional[str], shard: ConversationRAGMemory) -> bool:
+        # Flush while the shard is still registered, so a concurrent get()
+        # returns this instance instead of loading a second copy whose
+        # journal the flush would then delete
+        if shard.pending_journal_entries:
+            shard.compact()
+        with self._lock:
+            if (
+                self._shards.get(session_id) is not shard
+                or self._pins.get(session_id)
+                or shard.pending_journal_entries
+            ):
+                return False
+            del self._shards[session_id]
+        return True
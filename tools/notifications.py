@@ -0,0 +1,219 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+
+class NotificationSink(ABC):
+    """Destination for notifications; ``send`` raises if delivery failed."""
+
+    @abstractmethod
+    def send(self, batch: List[Dict]) -> None:
+        pass
+
+
+class StdoutSink(NotificationSink):
+    def send(self, batch: List[Dict]) -> None:
+        for notification in batch:
+            print(f"[NOTIFICATION] {notification['message']}")
+
+
+class FileSink(NotificationSink):
+    """Appends notifications to a file as JSON lines."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, batch: List[Dict]) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(n, ensure_ascii=False) + "\n" for n in batch))
+
+
+class WebhookSink(NotificationSink):
+    """POSTs each batch as ``{"notifications": [...]}`` to a URL.
+
+    One keep-alive client is reused for every request; any non-2xx answer
+    counts as a failure so the dispatcher retries it.
+    """
+
+    def __init__(self, url: str, timeout: float = 5.0, headers: Optional[Dict] = None):
+        import httpx
+
+        self.url = url
+        self._client = httpx.Client(timeout=timeout, headers=headers)
+
+    def send(self, batch: List[Dict]) -> None:
+        response = self._client.post(self.url, json={"notifications": batch})
+        response.raise_for_status()
+
+
+class NotificationDispatcher:
+    """Delivers notifications to sinks from a background thread.
+
+    ``notify`` only enqueues, so callers never wait on a slow sink. The
+    worker groups up to ``batch_size`` queued notifications (waiting at
+    most ``batch_interval`` seconds to fill a batch) and hands each batch
+    to every sink, retrying a failing sink up to ``max_retries`` times with
+    exponential backoff before dropping the batch for that sink. A
+    notification counts as sent once if any sink delivered it, and as
+    failed if none did.
+    """
+
+    def __init__(
+        self,
+        sinks: List[NotificationSink],
+        batch_size: int = 20,
+        batch_interval: float = 0.2,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        max_queue: int = 10000,
+    ):
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue(max_queue)
+        self._worker = threading.Thread(
+            target=self._run, name="notifications", daemon=True
+        )
+        self._worker.start()
+
+    def notify(self, message: str, **fields) -> bool:
+        """Queue a notification; returns False if the queue is full."""
+        notification = {
+            "message": message,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            **fields,
+        }
+        try:
+            self._queue.put_nowait(notification)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is delivered or given up on."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Deliver what is queued (up to ``timeout``) and stop the worker."""
+        self.flush(timeout)
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            return
+        self._worker.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sent": self.sent,
+                "failed": self.failed,
+                "dropped": self.dropped,
+                "queued": self._queue.qsize(),
+            }
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.batch_interval
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+
+            # Every sink gets the batch, even after one has delivered it
+            delivered = [self._deliver(sink, batch) for sink in self.sinks]
+            with self._lock:
+                if any(delivered):
+                    self.sent += len(batch)
+                else:
+                    self.failed += len(batch)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _deliver(self, sink: NotificationSink, batch: List[Dict]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                sink.send(batch)
+                return True
+            except Exception:
+                if attempt < self.max_retries:
+                    time.sleep(self.backoff * 2**attempt)
+        return False
+
+
+_notify_config = None
+_dispatcher: Optional[NotificationDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def configure_notifications(config=None):
+    """Use ``config``'s sinks; the dispatcher starts on the first notification."""
+    global _notify_config, _dispatcher
+    with _dispatcher_lock:
+        if config is _notify_config:
+            return
+        _notify_config = config
+        old, _dispatcher = _dispatcher, None
+    if old is not None:
+        old.close()
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    """Return the process-wide dispatcher, starting it on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            config = _notify_config
+            if config is None:
+                from config import Config as config
+            _dispatcher = NotificationDispatcher(
+                config.get_notification_sinks(),
+                batch_size=config.NOTIFY_BATCH_SIZE,
+                max_retries=config.NOTIFY_MAX_RETRIES,
+            )
+        return _dispatcher
+
+
+@atexit.register
+def close_dispatcher(timeout: Optional[float] = 5.0):
+    """Drain and stop the process-wide dispatcher, if it was started."""
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher is not None:
+        dispatcher.close(timeout)
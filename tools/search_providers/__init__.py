@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Tuple
+import threading
 
 
 class SearchProvider(ABC):
@@ -16,3 +18,73 @@ class SearchProvider(ABC):
             Formatted search results.
         """
         pass
+
+
+_factories: Dict[str, Callable[..., SearchProvider]] = {}
+_instances: Dict[Tuple, SearchProvider] = {}
+_lock = threading.RLock()
+
+
+def register_provider(name: str, factory: Callable[..., SearchProvider]):
+    """Register a provider factory under ``name``.
+
+    The factory is only called on first use, so registering a provider does
+    not import its client library.
+    """
+    with _lock:
+        _factories[name.lower()] = factory
+        for key in [key for key in _instances if key[0] == name.lower()]:
+            del _instances[key]
+
+
+def get_provider(name: str, **kwargs) -> SearchProvider:
+    """Return the shared provider instance for ``name`` and ``kwargs``.
+
+    Instances (and the HTTP clients they hold) are built once per process
+    and reused by every caller with the same arguments.
+    """
+    name = name.lower()
+    key = (name, tuple(sorted(kwargs.items())))
+    with _lock:
+        provider = _instances.get(key)
+        if provider is None:
+            if name not in _factories:
+                raise ValueError(f"Unknown search provider: {name}")
+            provider = _instances[key] = _factories[name](**kwargs)
+        return provider
+
+
+def available_providers() -> List[str]:
+    return sorted(_factories)
+
+
+def clear_provider_cache():
+    """Drop shared instances so the next ``get_provider`` rebuilds them."""
+    with _lock:
+        _instances.clear()
+
+
+def _duckduckgo() -> SearchProvider:
+    from .duckduckgo import DuckDuckGoProvider
+
+    return DuckDuckGoProvider()
+
+
+def _tavily(api_key: str) -> SearchProvider:
+    from .tavily import TavilyProvider
+
+    return TavilyProvider(api_key)
+
+
+def _composite(members: Tuple[Tuple[str, Tuple], ...], **options) -> SearchProvider:
+    from .composite import CompositeProvider
+
+    return CompositeProvider(
+        {name: get_provider(name, **dict(kwargs)) for name, kwargs in members},
+        **options,
+    )
+
+
+register_provider("duckduckgo", _duckduckgo)
+register_provider("tavily", _tavily)
+register_provider("composite", _composite)
@@ -0,0 +1,125 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Dict, List, Tuple
+import threading
+import time
+from . import SearchProvider
+
+
+class CompositeProvider(SearchProvider):
+    """Fans a query out to several providers concurrently.
+
+    In ``first`` mode the first successful answer is returned, so latency is
+    set by the fastest healthy backend. In ``merge`` mode every answer that
+    arrives within ``latency_budget`` seconds is merged with duplicate lines
+    removed. A provider that fails ``failure_threshold`` times in a row
+    (errors or timeouts) is skipped for ``cooldown`` seconds.
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, SearchProvider],
+        mode: str = "first",
+        timeout: float = 10.0,
+        latency_budget: float = 3.0,
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+    ):
+        if mode not in ("first", "merge"):
+            raise ValueError(f"Unknown composite search mode: {mode}")
+        if not providers:
+            raise ValueError("CompositeProvider needs at least one provider")
+        self.providers = dict(providers)
+        self.mode = mode
+        self.timeout = timeout
+        self.latency_budget = latency_budget
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._failures = {name: 0 for name in self.providers}
+        self._skip_until = {name: 0.0 for name in self.providers}
+        self._lock = threading.Lock()
+        # Timed-out calls keep their worker until they return, so leave room
+        self._executor = ThreadPoolExecutor(
+            max_workers=4 * len(self.providers), thread_name_prefix="search"
+        )
+
+    def healthy_providers(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            healthy = [name for name in self.providers if self._skip_until[name] <= now]
+        # With every backend cooling down, trying them beats failing outright
+        return healthy or list(self.providers)
+
+    def search(self, query: str, num_results: int = 3) -> str:
+        """Search all healthy providers concurrently."""
+        futures = {
+            self._executor.submit(self._call, name, query, num_results): name
+            for name in self.healthy_providers()
+        }
+        if self.mode == "first":
+            return self._first(futures, query)
+        return self._merge(futures, query)
+
+    def _call(self, name: str, query: str, num_results: int) -> Tuple[bool, str]:
+        try:
+            result = self.providers[name].search(query, num_results)
+        except Exception as e:
+            result = f"Error searching: {str(e)}"
+        ok = not result.startswith("Error")
+        self._record(name, ok)
+        return ok, result
+
+    def _record(self, name: str, ok: bool):
+        with self._lock:
+            if ok:
+                self._failures[name] = 0
+                return
+            self._failures[name] += 1
+            if self._failures[name] >= self.failure_threshold:
+                self._skip_until[name] = time.monotonic() + self.cooldown
+
+    def _record_timeouts(self, futures):
+        for future, name in futures.items():
+            if not future.done():
+                self._record(name, False)
+
+    def _first(self, futures, query: str) -> str:
+        errors = []
+        try:
+            for future in as_completed(futures, timeout=self.timeout):
+                ok, result = future.result()
+                if ok:
+                    return result
+                errors.append(f"{futures[future]}: {result}")
+        except FuturesTimeoutError:
+            self._record_timeouts(futures)
+            errors.append(f"timed out after {self.timeout}s")
+        return f"Error searching '{query}': " + "; ".join(errors)
+
+    def _merge(self, futures, query: str) -> str:
+        done, _ = wait(futures, timeout=min(self.latency_budget, self.timeout))
+        self._record_timeouts(futures)
+
+        lines, seen, errors = [], set(), []
+        # Keep provider order stable so merged output is deterministic
+        for future, name in futures.items():
+            if future not in done:
+                continue
+            ok, result = future.result()
+            if not ok:
+                errors.append(f"{name}: {result}")
+                continue
+            body = result.splitlines()
+            if body and body[0].startswith("Search results for"):
+                body = body[1:]
+            for line in body:
+                key = " ".join(line.lower().split())
+                if key and key not in seen:
+                    seen.add(key)
+                    lines.append(line)
+
+        if not lines:
+            if not errors:
+                errors.append(f"no provider answered within {self.latency_budget}s")
+            return f"Error searching '{query}': " + "; ".join(errors)
+        return f"Search results for '{query}':\n" + "\n".join(lines)
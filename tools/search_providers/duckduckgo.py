@@ -1,4 +1,3 @@
-from langchain_community.tools import DuckDuckGoSearchRun
 from . import SearchProvider
 
 
@@ -6,6 +5,8 @@ class DuckDuckGoProvider(SearchProvider):
     """DuckDuckGo search provider (free, no API key)."""
 
     def __init__(self):
+        from langchain_community.tools import DuckDuckGoSearchRun
+
         self._search = DuckDuckGoSearchRun()
 
     def search(self, query: str, num_results: int = 3) -> str:
@@ -1,18 +1,31 @@
-from langchain_community.tools.tavily_search import TavilySearchResults
+import httpx
 from . import SearchProvider
 
+TAVILY_API_URL = "https://api.tavily.com"
+
 
 class TavilyProvider(SearchProvider):
     """Tavily search provider (higher quality, requires API key)."""
 
-    def __init__(self, api_key: str):
-        self._search = TavilySearchResults(max_results=5)
+    def __init__(self, api_key: str, timeout: float = 30.0):
         self.api_key = api_key
+        self.timeout = timeout
+        # One keep-alive client for every search made through this provider
+        self._client = httpx.Client(timeout=timeout)
 
     def search(self, query: str, num_results: int = 3) -> str:
         """Search using Tavily."""
         try:
-            results = self._search.invoke({"query": query})
+            response = self._client.post(
+                f"{TAVILY_API_URL}/search",
+                json={
+                    "api_key": self.api_key,
+                    "query": query,
+                    "max_results": num_results,
+                },
+            )
+            response.raise_for_status()
+            results = response.json()
             formatted = []
             for item in results.get("results", []):
                 formatted.append(
@@ -1,22 +1,85 @@
+from typing import Optional
+import threading
 from langchain.tools import tool
+from cache_store import CacheStore
+from config import Config
+
+
+class SearchCache(CacheStore):
+    """LRU cache of search results with a TTL and optional SQLite tier.
+
+    Keys are the normalized query plus ``num_results``, so results survive
+    restarts without hitting the provider again.
+    """
+
+    def __init__(
+        self, max_entries: int = 256, ttl: float = 3600, db_path: Optional[str] = None
+    ):
+        super().__init__("search_cache", max_entries, ttl, db_path)
+
+    @staticmethod
+    def make_key(query: str, num_results: int) -> str:
+        """Cache key: case- and whitespace-insensitive query plus result count."""
+        return f"{num_results}:{' '.join(query.lower().split())}"
 
 
 class SearchManager:
     """Manages search provider swapping."""
 
-    def __init__(self, provider=None):
+    def __init__(self, provider=None, cache: Optional[SearchCache] = None):
         if provider is None:
-            from tools.search_providers.duckduckgo import DuckDuckGoProvider
+            from tools.search_providers import get_provider
 
-            provider = DuckDuckGoProvider()
+            provider = get_provider("duckduckgo")
         self.provider = provider
+        self.cache = cache
 
     def search(self, query: str, num_results: int = 3) -> str:
-        """Delegate to current provider."""
-        return self.provider.search(query, num_results)
+        """Delegate to current provider, serving repeated queries from cache."""
+        if self.cache is None:
+            return self.provider.search(query, num_results)
+
+        key = SearchCache.make_key(query, num_results)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self.provider.search(query, num_results)
+        # Providers report failures as text; don't pin those in the cache
+        if not result.startswith("Error"):
+            self.cache.set(key, result)
+        return result
+
+
+_search_config = Config
+_search_manager: Optional[SearchManager] = None
+_search_lock = threading.Lock()
+
+
+def configure_search(config=None, manager: Optional[SearchManager] = None):
+    """Point ``search_web`` at ``config``'s provider, or at ``manager``.
+
+    Nothing is built here; the provider is created on the first search.
+    Reconfiguring with the config already in use keeps the current manager.
+    """
+    global _search_config, _search_manager
+    config = config or Config
+    with _search_lock:
+        if manager is not None or config is not _search_config:
+            _search_manager = manager
+        _search_config = config
 
 
-_search_manager = SearchManager()
+def get_search_manager() -> SearchManager:
+    """Return the process-wide manager, building it on first use."""
+    global _search_manager
+    with _search_lock:
+        if _search_manager is None:
+            _search_manager = SearchManager(
+                provider=_search_config.get_search_provider(),
+                cache=_search_config.get_search_cache(),
+            )
+        return _search_manager
 
 
 @tool
@@ -30,4 +93,4 @@ def search_web(query: str, num_results: int = 3) -> str:
     Returns:
         Formatted search results with summaries.
     """
-    return _search_manager.search(query, num_results)
+    return get_search_manager().search(query, num_results)